@@ -1,14 +1,15 @@
 import socket
 
+from f1_ps_telemetry.receive import PacketReceiver
 from f1_ps_telemetry.unpack_udp import UDPUnpacker
 
 udp_socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
 udp_socket.bind(("", 20777))
 
+receiver = PacketReceiver(udp_socket)
 unpacker = UDPUnpacker()
 
-while True:
-    udp_packet = udp_socket.recv(2048)
+for udp_packet in receiver:
     packet = unpacker.unpack_udp_packet(udp_packet)
     print("Received:", packet)
     print()
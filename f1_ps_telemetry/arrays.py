@@ -0,0 +1,718 @@
+"""NumPy structured-array views of the F1 22 telemetry packets.
+
+The dtypes defined here are derived from the ctypes packet definitions in the
+packets module, so they always mirror the packed on-wire layout byte-for-byte.
+Decoding a packet is a single np.frombuffer() call, and the 22-element car
+arrays come out as columns, e.g. record['carMotionData']['worldPositionX'] is a
+float32[22].
+
+This module requires NumPy, which is an optional dependency of this package
+(pip install f1_ps_telemetry[numpy]).
+"""
+
+import ctypes
+
+import numpy as np
+
+from .packets import CarMotionData_V1
+from .packets import HEADER_OFF_PACKET_ID
+from .packets import PACKET_FORMAT
+from .packets import PACKET_SIZE_BY_ID
+from .packets import PACKET_TYPE_BY_ID
+from .packets import PACKET_VERSION
+from .packets import PacketCarDamageData_V1
+from .packets import PacketCarSetupData_V1
+from .packets import PacketCarStatusData_V1
+from .packets import PacketCarTelemetryData_V1
+from .packets import PacketFinalClassificationData_V1
+from .packets import PacketHeader
+from .packets import PacketLapData_V1
+from .packets import PacketLobbyInfoData_V1
+from .packets import PacketMotionData_V1
+from .packets import PacketParticipantsData_V1
+from .packets import PacketSessionData_V1
+from .packets import PacketSessionHistoryData_V1
+from .unpack_udp import packet_type_for
+from .unpack_udp import UnpackError
+
+###############################################
+#                                             #
+#  __________  Structured dtypes  __________  #
+#                                             #
+###############################################
+
+_dtype_cache = {}
+
+
+def dtype_for(ctype) -> np.dtype:
+    """Return the NumPy dtype matching the memory layout of a ctypes type.
+
+    Structures and unions become structured dtypes with explicit offsets,
+    arrays become sub-array dtypes and char arrays become fixed-size byte
+    strings.
+    """
+    dtype = _dtype_cache.get(ctype)
+    if dtype is None:
+        dtype = _dtype_cache[ctype] = _build_dtype(ctype)
+    return dtype
+
+
+def _build_dtype(ctype) -> np.dtype:
+    if issubclass(ctype, (ctypes.Structure, ctypes.Union)):
+        names = []
+        formats = []
+        offsets = []
+        for (fname, ftype) in ctype._fields_:
+            names.append(fname)
+            formats.append(dtype_for(ftype))
+            offsets.append(getattr(ctype, fname).offset)
+        return np.dtype(
+            {
+                "names": names,
+                "formats": formats,
+                "offsets": offsets,
+                "itemsize": ctypes.sizeof(ctype),
+            },
+            align=False,
+        )
+    if issubclass(ctype, ctypes.Array):
+        if ctype._type_ is ctypes.c_char:
+            return np.dtype("S{}".format(ctype._length_))
+        return np.dtype((dtype_for(ctype._type_), (ctype._length_,)))
+    if ctype is ctypes.c_char:
+        return np.dtype("S1")
+    # Simple types: the ctypes type code is also a valid NumPy type code with
+    # the same (native) size.
+    return np.dtype("<" + ctype._type_)
+
+
+MOTION_DTYPE = dtype_for(PacketMotionData_V1)
+SESSION_DTYPE = dtype_for(PacketSessionData_V1)
+LAP_DATA_DTYPE = dtype_for(PacketLapData_V1)
+PARTICIPANTS_DTYPE = dtype_for(PacketParticipantsData_V1)
+CAR_SETUPS_DTYPE = dtype_for(PacketCarSetupData_V1)
+CAR_TELEMETRY_DTYPE = dtype_for(PacketCarTelemetryData_V1)
+CAR_STATUS_DTYPE = dtype_for(PacketCarStatusData_V1)
+CAR_DAMAGE_DTYPE = dtype_for(PacketCarDamageData_V1)
+SESSION_HISTORY_DTYPE = dtype_for(PacketSessionHistoryData_V1)
+
+# The dtypes of all packet types, indexed by packet id. These are built when
+# the module is imported, so that no decoding call pays for building a dtype on
+# first use.
+PACKET_DTYPE_BY_ID = tuple(
+    dtype_for(packet_type) for packet_type in PACKET_TYPE_BY_ID
+)
+
+
+def unpack_packet(packet, packet_type) -> np.void:
+    """Decode a raw UDP packet of the given packet type as a NumPy record.
+
+    The record is a view on the packet buffer; no field is converted until it
+    is accessed.
+    """
+    return np.frombuffer(packet, dtype=dtype_for(packet_type), count=1)[0]
+
+
+def _unpack_expected(packet, packet_type) -> np.void:
+    """Decode a packet that must be of the given type, raw or a structure.
+
+    Raises:
+        UnpackError if a raw packet is malformed.
+        ValueError if the packet is of another type.
+    """
+    if isinstance(packet, ctypes.Structure):
+        actual_type = type(packet)
+    else:
+        actual_type = packet_type_for(packet)
+    if actual_type is not packet_type:
+        raise ValueError(
+            "Expected a {} packet but got a {} packet.".format(
+                packet_type.__name__, actual_type.__name__
+            )
+        )
+    return unpack_packet(packet, packet_type)
+
+
+def parse_packet(packet, nbytes: int = None) -> np.void:
+    """Decode a raw UDP packet of any type as a single NumPy record,
+    dispatching on its header fields.
+
+    Args:
+        packet: the contents of the UDP packet; or, if nbytes is given, a
+            larger receive buffer holding the packet at its start.
+        nbytes: the size of the packet; by default, the size of packet.
+
+    Raises:
+        UnpackError if a problem is detected.
+    """
+    return unpack_packet(packet, packet_type_for(packet, nbytes))
+
+
+def parse_many(buffer, packet_id: int, count: int = -1) -> np.ndarray:
+    """Decode a buffer holding consecutive packets of the same type as a
+    structured array, one record per packet.
+
+    Args:
+        buffer: the concatenated packets.
+        packet_id: the packet id shared by all the packets.
+        count: the number of packets to decode; by default, all the packets in
+            the buffer.
+
+    Returns:
+        A structured array viewing the buffer, e.g.
+        result['carMotionData']['speed'] has shape (count, 22).
+    """
+    dtype = PACKET_DTYPE_BY_ID[packet_id]
+    return np.frombuffer(buffer, dtype=dtype, count=count)
+
+
+# The array of per-car records of each packet type; for the session history
+# packet, the array of per-lap records.
+CAR_ARRAY_FIELDS = {
+    PacketMotionData_V1: "carMotionData",
+    PacketLapData_V1: "lapData",
+    PacketParticipantsData_V1: "participants",
+    PacketCarSetupData_V1: "carSetups",
+    PacketCarTelemetryData_V1: "carTelemetryData",
+    PacketCarStatusData_V1: "carStatusData",
+    PacketFinalClassificationData_V1: "classificationData",
+    PacketLobbyInfoData_V1: "lobbyPlayers",
+    PacketCarDamageData_V1: "carDamageData",
+    PacketSessionHistoryData_V1: "lapHistoryData",
+}
+
+# (element dtype, byte offset, element count) of each of the arrays above.
+_CAR_ARRAYS = {}
+for (_packet_type, _fname) in CAR_ARRAY_FIELDS.items():
+    _array_type = dict(_packet_type._fields_)[_fname]
+    _CAR_ARRAYS[_packet_type] = (
+        dtype_for(_array_type._type_),
+        getattr(_packet_type, _fname).offset,
+        _array_type._length_,
+    )
+del _packet_type, _fname, _array_type
+
+
+def as_numpy(packet, packet_type=None) -> np.ndarray:
+    """Return the car array of a packet as a one-dimensional structured array
+    viewing the packet buffer.
+
+    The fields of the result are columns over all cars, e.g.
+    as_numpy(packet)['speed'] is a uint16[22] for a car telemetry packet, and
+    as_numpy(packet)['lapTimeInMS'] is a uint32[100] for a session history
+    packet.
+
+    Args:
+        packet: a raw UDP packet, or a packet structure.
+        packet_type: the ctypes packet type; by default, it is determined from
+            the header fields.
+
+    Raises:
+        UnpackError if a problem is detected.
+        ValueError if the packet type has no car array (session and event
+            packets).
+    """
+    if packet_type is None:
+        if isinstance(packet, ctypes.Structure):
+            packet_type = type(packet)
+        else:
+            packet_type = packet_type_for(packet)
+    try:
+        (dtype, offset, count) = _CAR_ARRAYS[packet_type]
+    except KeyError:
+        raise ValueError(
+            "{} has no car array".format(packet_type.__name__)
+        ) from None
+    return np.frombuffer(packet, dtype=dtype, count=count, offset=offset)
+
+
+def load_capture(path, packet_id: int, mode: str = "r") -> np.memmap:
+    """Memory-map a capture file of consecutive packets of the same type as a
+    structured array.
+
+    Packets are only read from disk as the records are accessed, so even large
+    recordings open instantly.
+    """
+    return np.memmap(path, dtype=PACKET_DTYPE_BY_ID[packet_id], mode=mode)
+
+
+def scan_headers(buffer) -> tuple:
+    """Locate the packets in a buffer of consecutive raw packets of mixed
+    types, e.g. a capture file.
+
+    Only the packet id of each header is read, and used to step to the next
+    packet. The packet format and version of all the packets are then checked
+    at once, as arrays.
+
+    Returns:
+        An (offsets, packet_ids) tuple of arrays, giving the byte offset and
+        the packet id of each packet.
+
+    Raises:
+        UnpackError if a packet id is unknown, a packet has the wrong packet
+            format or version, or the last packet is truncated.
+    """
+    data = memoryview(buffer).cast("B")
+    size = len(data)
+    sizes = PACKET_SIZE_BY_ID
+    num_packet_ids = len(sizes)
+    offsets = []
+    packet_ids = []
+    offset = 0
+    while offset < size:
+        if offset + HEADER_OFF_PACKET_ID >= size:
+            raise UnpackError(
+                "Bad telemetry packet: truncated header at offset {}.".format(
+                    offset
+                )
+            )
+        packet_id = data[offset + HEADER_OFF_PACKET_ID]
+        if packet_id >= num_packet_ids:
+            raise UnpackError(
+                "Bad telemetry packet: unknown packet id {} at offset {}."
+                .format(packet_id, offset)
+            )
+        offsets.append(offset)
+        packet_ids.append(packet_id)
+        offset += sizes[packet_id]
+    if offset > size:
+        raise UnpackError(
+            "Bad telemetry packet: truncated packet at offset {}.".format(
+                offsets[-1]
+            )
+        )
+    offsets = np.array(offsets, dtype=np.int64)
+    packet_ids = np.array(packet_ids, dtype=np.uint8)
+    _check_header_keys(buffer, offsets, packet_ids)
+    return (offsets, packet_ids)
+
+
+def _check_header_keys(
+    buffer, offsets: np.ndarray, packet_ids: np.ndarray
+) -> None:
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    formats = data[offsets] | (data[offsets + 1].astype(np.uint16) << 8)
+    versions = data[offsets + PacketHeader.packetVersion.offset]
+    bad = np.flatnonzero(
+        (formats != PACKET_FORMAT) | (versions != PACKET_VERSION)
+    )
+    if bad.size:
+        i = bad[0]
+        key = (int(formats[i]), int(versions[i]), int(packet_ids[i]))
+        raise UnpackError(
+            "Bad telemetry packet: no match for key fields {!r} at offset {}."
+            .format(key, int(offsets[i]))
+        )
+
+
+def gather_packets(
+    buffer, offsets: np.ndarray, packet_ids: np.ndarray, packet_id: int
+) -> np.ndarray:
+    """Collect all the packets of one type from a buffer of mixed packets into
+    a structured array.
+
+    The packets are copied with a single indexing operation over a sliding
+    window view of the buffer (which does not build an index array per byte),
+    so that the columns of the result are contiguous, e.g.
+    gather_packets(...)['carTelemetryData']['speed'] has shape (count, 22).
+
+    Args:
+        buffer: the concatenated packets.
+        offsets, packet_ids: the packet locations, as returned by
+            scan_headers().
+        packet_id: the packet id of the packets to collect.
+    """
+    dtype = PACKET_DTYPE_BY_ID[packet_id]
+    starts = offsets[packet_ids == packet_id]
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if starts.size == 0 or data.size < dtype.itemsize:
+        # The window view needs a buffer at least one packet long.
+        return np.empty(0, dtype=dtype)
+    windows = np.lib.stride_tricks.sliding_window_view(data, dtype.itemsize)
+    return windows[starts].view(dtype)[:, 0]
+
+
+# Float fields stored at half precision by to_storage(): world positions and
+# velocities, g-forces and orientation. The int16 direction fields are already
+# quantised and are kept as they are.
+HALF_PRECISION_FIELDS = frozenset(
+    {
+        "worldPositionX",
+        "worldPositionY",
+        "worldPositionZ",
+        "worldVelocityX",
+        "worldVelocityY",
+        "worldVelocityZ",
+        "gForceLateral",
+        "gForceLongitudinal",
+        "gForceVertical",
+        "yaw",
+        "pitch",
+        "roll",
+    }
+)
+
+
+def storage_dtype(
+    dtype: np.dtype, half_precision_fields=HALF_PRECISION_FIELDS
+) -> np.dtype:
+    """Return a packed copy of a structured dtype in which the named float32
+    fields are narrowed to float16.
+
+    Fields are matched by name at any nesting level.
+    """
+    fields = []
+    for name in dtype.names:
+        fdtype = dtype.fields[name][0]
+        if fdtype.subdtype is not None:
+            (base, shape) = fdtype.subdtype
+        else:
+            (base, shape) = (fdtype, ())
+        if base.names is not None:
+            base = storage_dtype(base, half_precision_fields)
+        elif name in half_precision_fields and base == np.float32:
+            base = np.dtype("<f2")
+        fields.append((name, base, shape))
+    return np.dtype(fields)
+
+
+def to_storage(
+    records: np.ndarray, half_precision_fields=HALF_PRECISION_FIELDS
+) -> np.ndarray:
+    """Convert decoded records to their compact storage form, e.g. for writing
+    a recording to disk.
+
+    The fields named in half_precision_fields are stored as float16, halving
+    their size; pass an empty set to keep full float32 precision (e.g. for
+    driving a motion platform from a replay).
+    """
+    return records.astype(storage_dtype(records.dtype, half_precision_fields))
+
+
+def from_storage(stored: np.ndarray, packet_id: int) -> np.ndarray:
+    """Convert records produced by to_storage() back to the full packet layout
+    of the given packet id.
+    """
+    return stored.astype(PACKET_DTYPE_BY_ID[packet_id])
+
+
+##########################################################
+#                                                        #
+#  __________  Motion packet derived arrays  __________  #
+#                                                        #
+##########################################################
+
+# Scale factor converting the int16 packed normals of CarMotionData_V1 to
+# floats in the range [-1.0, 1.0].
+NORMAL_SCALE = np.float32(1.0 / 32767.0)
+
+# The six direction fields (worldForwardDirX..Z, worldRightDirX..Z) are
+# adjacent int16 values in each car's record, so they can be viewed as a single
+# (6,) int16 sub-array without copying.
+_DIRECTIONS_DTYPE = np.dtype(
+    {
+        "names": ["directions"],
+        "formats": [("<i2", (6,))],
+        "offsets": [CarMotionData_V1.worldForwardDirX.offset],
+        "itemsize": ctypes.sizeof(CarMotionData_V1),
+    }
+)
+
+
+def motion_normals(motion) -> np.ndarray:
+    """Return the forward and right direction vectors of all cars in a motion
+    record as floats.
+
+    The result is a float32 array of shape (22, 6), with columns in the order
+    worldForwardDirX, worldForwardDirY, worldForwardDirZ, worldRightDirX,
+    worldRightDirY, worldRightDirZ. Use this rather than dividing the
+    individual int16 fields by 32767.0 per car.
+    """
+    directions = motion["carMotionData"].view(_DIRECTIONS_DTYPE)["directions"]
+    return np.multiply(directions, NORMAL_SCALE, dtype=np.float32)
+
+
+class MotionColumns():
+    """Named per-car columns of a decoded motion packet.
+
+    Each attribute is a view on the record (nothing is copied) holding the
+    value for each of the 22 cars, so reductions such as pos_x.max() or
+    np.hypot(vel_x, vel_z) run over all cars at once. For an array of records,
+    as returned by parse_many(), each column has shape (count, 22).
+    """
+
+    def __init__(self, motion):
+        cars = motion["carMotionData"]
+        self.pos_x = cars["worldPositionX"]
+        self.pos_y = cars["worldPositionY"]
+        self.pos_z = cars["worldPositionZ"]
+        self.vel_x = cars["worldVelocityX"]
+        self.vel_y = cars["worldVelocityY"]
+        self.vel_z = cars["worldVelocityZ"]
+        self.g_force_lateral = cars["gForceLateral"]
+        self.g_force_longitudinal = cars["gForceLongitudinal"]
+        self.g_force_vertical = cars["gForceVertical"]
+        self.yaw = cars["yaw"]
+        self.pitch = cars["pitch"]
+        self.roll = cars["roll"]
+
+
+class LapDataColumns():
+    """Named per-car columns of a decoded lap data packet, as views on the
+    record (see MotionColumns).
+    """
+
+    def __init__(self, lap_data):
+        cars = lap_data["lapData"]
+        self.last_lap_time_ms = cars["lastLapTimeInMS"]
+        self.current_lap_time_ms = cars["currentLapTimeInMS"]
+        self.lap_distance = cars["lapDistance"]
+        self.total_distance = cars["totalDistance"]
+        self.car_position = cars["carPosition"]
+        self.current_lap_num = cars["currentLapNum"]
+        self.pit_status = cars["pitStatus"]
+        self.result_status = cars["resultStatus"]
+
+    def leader(self):
+        """Return the index of the race leader, or None if no car is in first
+        position (e.g. before the session starts).
+
+        Raises:
+            ValueError if the columns are of an array of records rather than
+                of a single record.
+        """
+        if self.car_position.ndim != 1:
+            raise ValueError(
+                "leader() needs the columns of a single record, not of "
+                "{} records.".format(len(self.car_position))
+            )
+        leaders = np.flatnonzero(self.car_position == 1)
+        return int(leaders[0]) if leaders.size else None
+
+
+#######################################################
+#                                                     #
+#  __________  Compact telemetry history  __________  #
+#                                                     #
+#######################################################
+
+# Fixed-point scale factors of the quantised TelemetryRing fields: the 0.0..1.0
+# pedal values are stored as uint8, and the -1.0..1.0 steering value as int8.
+_PEDAL_SCALE = np.float32(255.0)
+_STEER_SCALE = np.float32(127.0)
+
+
+class TelemetryRing():
+    """A fixed-capacity history of car telemetry frames, stored compactly for
+    later analysis.
+
+    Each push() stores one frame: the session time, and the speed, gear, engine
+    RPM, throttle, brake and steer of all 22 cars. The throttle, brake and
+    steer floats are quantised to 8-bit fixed-point, a quarter of their on-wire
+    size; the other fields keep their native types. The columns are (capacity,
+    22) arrays indexed by ring slot, so use to_float() to get the frames in
+    time order. Once the ring is full, each new frame replaces the oldest one.
+    """
+
+    def __init__(self, capacity: int):
+        """Create an empty ring.
+
+        Args:
+            capacity: the number of frames kept, at least 1.
+
+        Raises:
+            ValueError if the capacity is less than 1.
+        """
+        if capacity < 1:
+            raise ValueError(
+                "TelemetryRing capacity must be at least 1, not {!r}.".format(
+                    capacity
+                )
+            )
+        self.capacity = capacity
+        self._count = 0
+        self.session_time = np.zeros(capacity, dtype=np.float32)
+        self.speed = np.zeros((capacity, 22), dtype=np.uint16)
+        self.gear = np.zeros((capacity, 22), dtype=np.int8)
+        self.engine_rpm = np.zeros((capacity, 22), dtype=np.uint16)
+        self.throttle = np.zeros((capacity, 22), dtype=np.uint8)
+        self.brake = np.zeros((capacity, 22), dtype=np.uint8)
+        self.steer = np.zeros((capacity, 22), dtype=np.int8)
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def push(self, packet) -> None:
+        """Store the telemetry of a car telemetry packet (raw, or a
+        PacketCarTelemetryData_V1 structure).
+
+        Raises:
+            UnpackError if a raw packet is malformed.
+            ValueError if the packet is not a car telemetry packet.
+        """
+        record = _unpack_expected(packet, PacketCarTelemetryData_V1)
+        cars = record["carTelemetryData"]
+        slot = self._count % self.capacity
+        self.session_time[slot] = record["header"]["sessionTime"]
+        self.speed[slot] = cars["speed"]
+        self.gear[slot] = cars["gear"]
+        self.engine_rpm[slot] = cars["engineRPM"]
+        throttle = np.clip(cars["throttle"], 0.0, 1.0)
+        brake = np.clip(cars["brake"], 0.0, 1.0)
+        steer = np.clip(cars["steer"], -1.0, 1.0)
+        self.throttle[slot] = np.rint(throttle * _PEDAL_SCALE)
+        self.brake[slot] = np.rint(brake * _PEDAL_SCALE)
+        self.steer[slot] = np.rint(steer * _STEER_SCALE)
+        self._count += 1
+
+    def to_float(self) -> dict:
+        """Return the stored frames oldest first, with the quantised fields
+        scaled back to float32.
+
+        Returns:
+            A dict of arrays with one row per frame, keyed by the packet field
+            names: 'sessionTime', 'speed', 'gear', 'engineRPM', 'throttle',
+            'brake' and 'steer'.
+        """
+        order = np.arange(self._count - len(self), self._count) % self.capacity
+        return {
+            "sessionTime": self.session_time[order],
+            "speed": self.speed[order],
+            "gear": self.gear[order],
+            "engineRPM": self.engine_rpm[order],
+            "throttle": self.throttle[order] / _PEDAL_SCALE,
+            "brake": self.brake[order] / _PEDAL_SCALE,
+            "steer": self.steer[order] / _STEER_SCALE,
+        }
+
+
+############################################################
+#                                                          #
+#  __________  Per-wheel arrays of structures  __________  #
+#                                                          #
+############################################################
+
+# (element dtype, byte offset, element count) by (structure type, field name),
+# filled in by wheels() on first use.
+_wheel_layouts = {}
+
+
+def wheels(structure, fname: str) -> np.ndarray:
+    """Return a per-wheel array field of a ctypes structure as a NumPy array
+    viewing the structure's memory.
+
+    For example, wheels(car, "tyresPressure") for a CarTelemetryData_V1 is a
+    float32[4] in the order RL, RR, FL, FR, so per-wheel arithmetic runs on all
+    four wheels at once; writes to the result go to the structure.
+
+    Raises:
+        KeyError if the structure has no field of that name.
+        ValueError if the field is not an array of numbers.
+    """
+    key = (type(structure), fname)
+    layout = _wheel_layouts.get(key)
+    if layout is None:
+        ftype = dict(type(structure)._fields_)[fname]
+        is_array = issubclass(ftype, ctypes.Array)
+        if not is_array or ftype._type_ is ctypes.c_char:
+            raise ValueError(
+                "{}.{} is not an array of numbers.".format(
+                    type(structure).__name__, fname
+                )
+            )
+        layout = _wheel_layouts[key] = (
+            dtype_for(ftype._type_),
+            getattr(type(structure), fname).offset,
+            ftype._length_,
+        )
+    (dtype, offset, count) = layout
+    return np.frombuffer(structure, dtype=dtype, count=count, offset=offset)
+
+
+###########################################################
+#                                                         #
+#  __________  Session history lap analytics  __________  #
+#                                                         #
+###########################################################
+
+# Valid bits of LapHistoryData_V1.lapValidBitFlags, for the lap and for each
+# sector.
+_LAP_VALID = 0x01
+_SECTOR_VALID = (
+    ("sector1TimeInMS", 0x02),
+    ("sector2TimeInMS", 0x04),
+    ("sector3TimeInMS", 0x08),
+)
+
+
+def _completed_laps(packet) -> np.ndarray:
+    record = _unpack_expected(packet, PacketSessionHistoryData_V1)
+    return record["lapHistoryData"][:record["numLaps"]]
+
+
+def _min_valid(times: np.ndarray, valid: np.ndarray):
+    times = times[valid & (times > 0)]
+    return int(times.min()) if times.size else None
+
+
+def best_lap_ms(packet):
+    """Return the best valid lap time of a session history packet in
+    milliseconds, or None if there is none.
+
+    Args:
+        packet: a raw session history packet, or a PacketSessionHistoryData_V1
+            structure.
+
+    Raises:
+        UnpackError if a raw packet is malformed.
+        ValueError if the packet is not a session history packet.
+    """
+    laps = _completed_laps(packet)
+    valid = (laps["lapValidBitFlags"] & _LAP_VALID) != 0
+    return _min_valid(laps["lapTimeInMS"], valid)
+
+
+def sector_mins(packet) -> tuple:
+    """Return the best valid time of each of the three sectors of a session
+    history packet in milliseconds.
+
+    Args:
+        packet: a raw session history packet, or a PacketSessionHistoryData_V1
+            structure.
+
+    Returns:
+        A (sector 1, sector 2, sector 3) tuple, with None for sectors that have
+        no valid time.
+
+    Raises:
+        UnpackError if a raw packet is malformed.
+        ValueError if the packet is not a session history packet.
+    """
+    laps = _completed_laps(packet)
+    flags = laps["lapValidBitFlags"]
+    return tuple(
+        _min_valid(laps[fname], (flags & mask) != 0)
+        for (fname, mask) in _SECTOR_VALID
+    )
+
+
+##########################################
+#                                        #
+#  __________  Button flags  __________  #
+#                                        #
+##########################################
+
+_BUTTON_SHIFTS = np.arange(32, dtype=np.uint32)
+
+
+def decode_buttons_bulk(words) -> np.ndarray:
+    """Decode an array of 'buttonStatus' bit-masks, e.g. from a recording of
+    button events, all at once.
+
+    Returns:
+        A bool array with one extra trailing axis of length 32: result[..., k]
+        tells whether the button with flag value 1 << k (see ButtonFlag) is
+        pressed.
+    """
+    words = np.asarray(words, dtype=np.uint32)
+    return ((words[..., np.newaxis] >> _BUTTON_SHIFTS) & 1).astype(bool)
@@ -0,0 +1,102 @@
+"""Lazy, zero-copy views of raw telemetry packets.
+
+A lazy view keeps a reference to the raw packet buffer and decodes a field only
+when it is accessed, using a precompiled struct.Struct at the field's offset.
+This is cheaper than unpacking the whole packet into a ctypes structure when
+only a handful of fields are read, e.g. just the speed from a speed trap event.
+
+Field names are the same as in the ctypes packet types. Nested structures are
+returned as lazy views themselves, and arrays are returned as tuples.
+"""
+
+import ctypes
+import struct
+
+from .packed_little_endian import struct_format
+from .unpack_udp import packet_type_for
+
+
+class LazyView():
+    """Base type for the generated lazy views; wraps a buffer and the offset of
+    the structure within it.
+    """
+
+    __slots__ = ("_buffer", "_offset")
+
+    def __init__(self, buffer, offset: int = 0):
+        self._buffer = buffer
+        self._offset = offset
+
+
+_view_types = {}
+
+
+def lazy_view_type(ctype) -> type:
+    """Return the lazy view type for a ctypes structure (or union) type,
+    generating it on first use.
+    """
+    view_type = _view_types.get(ctype)
+    if view_type is None:
+        namespace = {"__slots__": ()}
+        for (fname, ftype) in ctype._fields_:
+            namespace[fname] = _lazy_field(ftype, getattr(ctype, fname).offset)
+        view_type = _view_types[ctype] = type(
+            "Lazy" + ctype.__name__, (LazyView,), namespace
+        )
+    return view_type
+
+
+def _lazy_field(ftype, offset: int) -> property:
+    if issubclass(ftype, (ctypes.Structure, ctypes.Union)):
+        view_type = lazy_view_type(ftype)
+
+        def get(self):
+            return view_type(self._buffer, self._offset + offset)
+
+    elif issubclass(ftype, ctypes.Array) and issubclass(
+        ftype._type_, (ctypes.Structure, ctypes.Union)
+    ):
+        view_type = lazy_view_type(ftype._type_)
+        stride = ctypes.sizeof(ftype._type_)
+        offsets = tuple(offset + i * stride for i in range(ftype._length_))
+
+        def get(self):
+            return tuple(
+                view_type(self._buffer, self._offset + element_offset)
+                for element_offset in offsets
+            )
+
+    else:
+        unpack_from = struct.Struct("<" + struct_format(ftype)).unpack_from
+
+        if issubclass(ftype, ctypes.Array) and ftype._type_ is ctypes.c_char:
+            # Like ctypes, stop char arrays at the first null byte.
+            def get(self):
+                value = unpack_from(self._buffer, self._offset + offset)[0]
+                return value.split(b"\0", 1)[0]
+
+        elif issubclass(ftype, ctypes.Array):
+
+            def get(self):
+                return unpack_from(self._buffer, self._offset + offset)
+
+        else:
+
+            def get(self):
+                return unpack_from(self._buffer, self._offset + offset)[0]
+
+    return property(get)
+
+
+def lazy_unpack(packet) -> LazyView:
+    """Wrap a raw UDP packet in a lazy view of the appropriate packet type.
+
+    The packet is not copied, so the buffer must not be modified while the view
+    is in use; in particular, if the packet was received with
+    socket.recvfrom_into(), read the fields before receiving into the buffer
+    again.
+
+    Raises:
+        UnpackError if a problem is detected.
+    """
+    return lazy_view_type(packet_type_for(packet))(memoryview(packet))
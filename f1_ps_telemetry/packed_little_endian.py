@@ -1,4 +1,5 @@
 import ctypes
+import struct
 
 #########################################################
 #                                                       #
@@ -7,26 +8,218 @@ import ctypes
 #########################################################
 
 
-class PackedLittleEndianStructure(ctypes.LittleEndianStructure):
-    """The standard ctypes LittleEndianStructure, but tightly packed (no field padding), and with a proper repr() function.
+class PackedStructureType(type(ctypes.LittleEndianStructure)):
+    """The metaclass of PackedLittleEndianStructure.
+
+    It gives every structure type empty __slots__, as instances have a fixed
+    layout and need no __dict__, records its size in bytes as the SIZE class
+    attribute and a precompiled parser of its flattened fields as the STRUCT
+    class attribute (see as_tuple), and works out once per type how __repr__
+    should render each field. STRUCT is None for a type with a field that has
+    no struct equivalent (e.g. a union, a pointer, a bit field or a nested
+    structure that is not a PackedLittleEndianStructure); such a type can still
+    be defined, but its as_tuple() raises TypeError. These class attributes are
+    updated if _fields_ is assigned after the class statement.
+    """
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        namespace.setdefault("__slots__", ())
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+        cls._update_layout()
+        return cls
+
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        # ctypes allows _fields_ to be assigned once after the class statement
+        # (e.g. for self-referencing types); the layout is only known then.
+        if name == "_fields_":
+            cls._update_layout()
+
+    def _update_layout(cls):
+        cls.SIZE = ctypes.sizeof(cls)
+        cls.STRUCT = None
+        fields = getattr(cls, "_fields_", ())
+        if fields:
+            try:
+                cls.STRUCT = _flat_struct(cls)
+            except (TypeError, ValueError):
+                pass
+        # Note that char arrays are returned as bytes by ctypes, so they are
+        # not treated as arrays here.
+        cls._repr_fields = tuple(
+            (
+                field[0],
+                issubclass(field[1], ctypes.Array)
+                and field[1]._type_ is not ctypes.c_char,
+            )
+            for field in fields
+        )
+
+
+class PackedLittleEndianStructure(
+    ctypes.LittleEndianStructure, metaclass=PackedStructureType
+):
+    """The standard ctypes LittleEndianStructure, but tightly packed (no field
+    padding), and with a proper repr() function.
 
     This is the base type for all structures in the telemetry data.
     """
 
+    __slots__ = ()
     _pack_ = 1
 
+    @classmethod
+    def from_udp(cls, data):
+        """Create a structure from the contents of a UDP packet.
+
+        The packet buffer (bytes, bytearray or memoryview) is copied in a
+        single step; don't slice it first.
+        """
+        return cls.from_buffer_copy(data)
+
+    @classmethod
+    def from_address_copy(cls, address: int):
+        """Create a structure from a copy of the memory at a raw address, e.g.
+        a datagram buffer pointer.
+        """
+        instance = cls()
+        instance.copy_from_address(address)
+        return instance
+
+    def fill_from(self, buffer, offset: int = 0) -> None:
+        """Overwrite this structure in place from a buffer, starting at a byte
+        offset, so that an instance can be reused.
+
+        This allows a receive loop to use socket.recv_into() on a single
+        preallocated bytearray, and refill pooled structures from it without
+        creating a bytes object per packet.
+
+        Raises:
+            ValueError if the buffer holds fewer than SIZE bytes from the
+                offset.
+        """
+        source = memoryview(buffer).cast("B")
+        if len(source) - offset < self.SIZE:
+            raise ValueError(
+                "Buffer of {} bytes too short for {} bytes at offset {}"
+                .format(len(source), self.SIZE, offset)
+            )
+        memoryview(self).cast("B")[:] = source[offset:offset + self.SIZE]
+
+    def copy_from_address(self, address: int) -> None:
+        """Overwrite this structure in place with the memory at a raw address,
+        so that an instance can be reused.
+        """
+        ctypes.memmove(ctypes.addressof(self), address, self.SIZE)
+
+    def __reduce__(self):
+        # ctypes pickles structures through their __dict__, which the empty
+        # __slots__ remove; rebuild them from their bytes instead. This is also
+        # what copy.copy() and copy.deepcopy() use.
+        return (type(self).from_buffer_copy, (bytes(self),))
+
+    def as_tuple(self) -> tuple:
+        """Return the values of all fields as a flat tuple of Python numbers
+        and bytes, in a single unpack call.
+
+        Nested structures and arrays are flattened in field order. Char arrays
+        are returned as bytes of their full length, including any trailing NUL
+        characters.
+
+        Raises:
+            TypeError if a field has no struct equivalent (see struct_format).
+        """
+        parser = self.STRUCT
+        if parser is None:
+            # Raise the TypeError telling why there is no parser.
+            _flat_struct(type(self))
+        return parser.unpack_from(self)
+
     def __repr__(self):
-        fstr_list = []
-        for (fname, ftype) in self._fields_:
+        parts = [self.__class__.__name__, "("]
+        append = parts.append
+        for (fname, is_array) in self._repr_fields:
             value = getattr(self, fname)
-            if isinstance(value, (PackedLittleEndianStructure, int, float, bytes)):
-                vstr = repr(value)
-            elif isinstance(value, ctypes.Array):
-                vstr = "[{}]".format(", ".join(repr(e) for e in value))
-            else:
-                raise RuntimeError(
-                    "Bad value {!r} of type {!r}".format(value, type(value))
-                )
-            fstr = "{}={}".format(fname, vstr)
-            fstr_list.append(fstr)
-        return "{}({})".format(self.__class__.__name__, ", ".join(fstr_list))
\ No newline at end of file
+            append(fname)
+            append("=")
+            append(_repr_array(value) if is_array else repr(value))
+            append(", ")
+        if self._repr_fields:
+            parts[-1] = ")"
+        else:
+            append(")")
+        return "".join(parts)
+
+
+def _repr_array(array) -> str:
+    return "[" + ", ".join(map(repr, array)) + "]"
+
+
+def _flat_struct(cls) -> struct.Struct:
+    """Return the precompiled parser of the flattened fields of a structure
+    type (see as_tuple).
+
+    Raises:
+        TypeError if the type has no struct equivalent.
+    """
+    flat = struct.Struct("<" + struct_format(cls))
+    if flat.size != ctypes.sizeof(cls):
+        raise TypeError(
+            "Struct format of {} is {} bytes, but the structure is {} bytes"
+            .format(cls.__name__, flat.size, ctypes.sizeof(cls))
+        )
+    return flat
+
+
+# struct format characters for the ctypes integer types, by size in bytes
+# (signed variants).
+_INTEGER_FORMATS = {1: "b", 2: "h", 4: "i", 8: "q"}
+
+
+def struct_format(ctype) -> str:
+    """Return the struct module format (without byte order prefix) describing
+    the layout of a ctypes type.
+
+    Arrays repeat their element format and structures are flattened field by
+    field, so unpacking with the format yields every scalar in declaration
+    order. Char arrays map to a single bytes value. Only structures derived
+    from PackedLittleEndianStructure are flattened, as the format has no
+    padding and is read as little-endian.
+
+    Raises:
+        TypeError if the type has no struct equivalent (e.g. a union, a bit
+            field, a big-endian type or a structure with padding).
+    """
+    if issubclass(ctype, ctypes.Union):
+        raise TypeError("No struct format for union type {!r}".format(ctype))
+    if issubclass(ctype, ctypes.Array):
+        if ctype._type_ is ctypes.c_char:
+            return "{}s".format(ctype._length_)
+        return struct_format(ctype._type_) * ctype._length_
+    if issubclass(ctype, ctypes.Structure):
+        if not issubclass(ctype, PackedLittleEndianStructure):
+            raise TypeError(
+                "No struct format for structure type {!r}, which is not a "
+                "PackedLittleEndianStructure".format(ctype)
+            )
+        # Reuse the format already compiled for a nested structure type rather
+        # than flattening it again.
+        flat = ctype.__dict__.get("STRUCT")
+        if flat is not None:
+            return flat.format[1:]
+        if any(len(field) > 2 for field in ctype._fields_):
+            raise TypeError(
+                "No struct format for bit fields of {!r}".format(ctype)
+            )
+        return "".join(struct_format(ftype) for (_, ftype) in ctype._fields_)
+    if getattr(ctype, "__ctype_le__", ctype) is not ctype:
+        raise TypeError(
+            "No struct format for big-endian type {!r}".format(ctype)
+        )
+    code = getattr(ctype, "_type_", None)
+    if code in ("f", "d", "c", "?"):
+        return code
+    if isinstance(code, str) and code.lower() in "bhilq":
+        fmt = _INTEGER_FORMATS[ctypes.sizeof(ctype)]
+        return fmt.upper() if code.isupper() else fmt
+    raise TypeError("No struct format for ctypes type {!r}".format(ctype))
@@ -6,8 +6,12 @@ This package is based on the CodeMasters Forum post documenting the F1 22 packet
 """
 
 from .packed_little_endian import PackedLittleEndianStructure
+from .packed_little_endian import struct_format
+import collections
 import ctypes
 import enum
+import struct
+import types
 
 
 ###########################################
@@ -53,36 +57,37 @@ class PacketID(enum.IntEnum):
     SESSION_HISTORY = 11
 
 
-PacketID.short_description = {
-    PacketID.MOTION: "Motion",
-    PacketID.SESSION: "Session",
-    PacketID.LAP_DATA: "Lap Data",
-    PacketID.EVENT: "Event",
-    PacketID.PARTICIPANTS: "Participants",
-    PacketID.CAR_SETUPS: "Car Setups",
-    PacketID.CAR_TELEMETRY: "Car Telemetry",
-    PacketID.CAR_STATUS: "Car Status",
-    PacketID.FINAL_CLASSIFICATION: "Final Classification",
-    PacketID.LOBBY_INFO: "Lobby Info",
-    PacketID.CAR_DAMAGE: "Car Damage",
-    PacketID.SESSION_HISTORY: "Session History",
-}
-
-
-PacketID.long_description = {
-    PacketID.MOTION: "Contains all motion data for player's car – only sent while player is in control",
-    PacketID.SESSION: "Data about the session – track, time left",
-    PacketID.LAP_DATA: "Data about all the lap times of cars in the session",
-    PacketID.EVENT: "Various notable events that happen during a session",
-    PacketID.PARTICIPANTS: "List of participants in the session, mostly relevant for multiplayer",
-    PacketID.CAR_SETUPS: "Packet detailing car setups for cars in the race",
-    PacketID.CAR_TELEMETRY: "Telemetry data for all cars",
-    PacketID.CAR_STATUS: "Status data for all cars",
-    PacketID.FINAL_CLASSIFICATION: "Final classification confirmation at the end of a race",
-    PacketID.LOBBY_INFO: "Information about players in a multiplayer lobby",
-    PacketID.CAR_DAMAGE: "Damage status for all cars",
-    PacketID.SESSION_HISTORY: "Lap and tyre data for session",
-}
+# Indexed directly by packet id, which is a dense range starting at 0.
+PacketID.short_description = (
+    "Motion",
+    "Session",
+    "Lap Data",
+    "Event",
+    "Participants",
+    "Car Setups",
+    "Car Telemetry",
+    "Car Status",
+    "Final Classification",
+    "Lobby Info",
+    "Car Damage",
+    "Session History",
+)
+
+
+PacketID.long_description = (
+    "Contains all motion data for player's car – only sent while player is in control",
+    "Data about the session – track, time left",
+    "Data about all the lap times of cars in the session",
+    "Various notable events that happen during a session",
+    "List of participants in the session, mostly relevant for multiplayer",
+    "Packet detailing car setups for cars in the race",
+    "Telemetry data for all cars",
+    "Status data for all cars",
+    "Final classification confirmation at the end of a race",
+    "Information about players in a multiplayer lobby",
+    "Damage status for all cars",
+    "Lap and tyre data for session",
+)
 
 #########################################################
 #                                                       #
@@ -300,18 +305,7 @@ class PacketSessionData_V1(PackedLittleEndianStructure):
             "pitStopRejoinPosition",
             ctypes.c_uint8,
         ),  # Predicted position to rejoin at (player)
-        ("steeringAssist", ctypes.c_uint8),  # 0 = off, 1 = on
-        ("brakingAssist", ctypes.c_uint8),  # 0 = off, 1 = low, 2 = medium, 3 = high
-        (
-            "gearboxAssist",
-            ctypes.c_uint8,
-        ),  # 1 = manual, 2 = manual & suggested gear, 3 = auto
-        ("pitAssist", ctypes.c_uint8),  # 0 = off, 1 = on
-        ("pitReleaseAssist", ctypes.c_uint8),  # 0 = off, 1 = on
-        ("ERSAssist", ctypes.c_uint8),  # 0 = off, 1 = on
-        ("DRSAssist", ctypes.c_uint8),  # 0 = off, 1 = on
-        ("dynamicRacingLine", ctypes.c_uint8),  # 0 = off, 1 = corners only, 2 = full
-        ("dynamicRacingLineType", ctypes.c_uint8),  # 0 = 2D, 1 = 3D
+        ("assistsBlock", ctypes.c_uint8 * 9),  # Driving assists, see ASSIST_FIELD_IDX below
         ("gameMode", ctypes.c_uint8),  # Game mode id - see appendix
         ("ruleSet", ctypes.c_uint8),  # Ruleset - see appendix
         ("timeOfDay", ctypes.c_uint32),  # Local time of day - minutes since midnight
@@ -323,6 +317,36 @@ class PacketSessionData_V1(PackedLittleEndianStructure):
     ]
 
 
+# Index of each driving assist within PacketSessionData_V1.assistsBlock.
+# The nine consecutive uint8 assist fields are declared as one array; the layout and offsets are unchanged.
+ASSIST_FIELD_IDX = {
+    "steeringAssist": 0,  # 0 = off, 1 = on
+    "brakingAssist": 1,  # 0 = off, 1 = low, 2 = medium, 3 = high
+    "gearboxAssist": 2,  # 1 = manual, 2 = manual & suggested gear, 3 = auto
+    "pitAssist": 3,  # 0 = off, 1 = on
+    "pitReleaseAssist": 4,  # 0 = off, 1 = on
+    "ERSAssist": 5,  # 0 = off, 1 = on
+    "DRSAssist": 6,  # 0 = off, 1 = on
+    "dynamicRacingLine": 7,  # 0 = off, 1 = corners only, 2 = full
+    "dynamicRacingLineType": 8,  # 0 = 2D, 1 = 3D
+}
+
+
+def _assist_property(index: int) -> property:
+    def get(self):
+        return self.assistsBlock[index]
+
+    def set(self, value):
+        self.assistsBlock[index] = value
+
+    return property(get, set)
+
+
+for (_name, _index) in ASSIST_FIELD_IDX.items():
+    setattr(PacketSessionData_V1, _name, _assist_property(_index))
+del _name, _index
+
+
 ###########################################################
 #                                                         #
 #  __________  Packet ID 2 : LAP DATA PACKET  __________  #
@@ -529,30 +553,6 @@ class Buttons_V1(PackedLittleEndianStructure):
     ]
 
 
-class EventDataDetailsMeta(type(ctypes.Union), type(PackedLittleEndianStructure)):
-    pass
-
-
-class EventDataDetails_V1(
-    ctypes.Union, PackedLittleEndianStructure, metaclass=EventDataDetailsMeta
-):
-    """The event details packet is different for each type of event. Make sure only the correct type is interpreted."""
-
-    _fields_ = [
-        ("fastestLap", FastestLap_V1),
-        ("retirement", Retirement_V1),
-        ("teamMateInPits", TeamMateInPits_V1),
-        ("raceWinner", RaceWinner_V1),
-        ("penalty", Penalty_V1),
-        ("speedTrap", SpeedTrap_V1),
-        ("startLIghts", StartLights_V1),
-        ("driveThroughPenaltyServed", DriveThroughPenaltyServed_V1),
-        ("stopGoPenaltyServed", StopGoPenaltyServed_V1),
-        ("flashback", Flashback_V1),
-        ("buttons", Buttons_V1),
-    ]
-
-
 class PacketEventData_V1(PackedLittleEndianStructure):
     """This packet gives details of events that happen during the course of a session.
 
@@ -563,13 +563,18 @@ class PacketEventData_V1(PackedLittleEndianStructure):
 
     _fields_ = [
         ("header", PacketHeader),  # Header
-        ("eventStringCode", ctypes.c_uint8 * 4),  # Event string code, see below
+        ("eventStringCode", ctypes.c_char * 4),  # Event string code, see below
         (
             "eventDetails",
-            EventDataDetails_V1,
-        ),  # Event details - should be interpreted differently for each type
+            ctypes.c_uint8 * 12,
+        ),  # Event details - should be interpreted differently for each type, see parse_event_details()
     ]
 
+    @property
+    def details(self):
+        """The event details interpreted according to the event string code, or None if the event has none."""
+        return parse_event_details(self.eventStringCode, self.eventDetails)
+
 
 @enum.unique
 class EventStringCode(enum.Enum):
@@ -635,6 +640,58 @@ EventStringCode.long_description = {
     EventStringCode.BUTN: "Button status changed",
 }
 
+
+# Map from the event string code read as a little-endian uint32 to the matching EventStringCode, so that the
+# 4-byte tag can be looked up as a single integer.
+EventStringCodeByUInt32 = {int.from_bytes(code.value, "little"): code for code in EventStringCode}
+
+
+def _event_details_parser(details_type):
+    # Decode the details with a single struct unpack into a namedtuple with the same name and fields as the
+    # ctypes structure.
+    details_tuple = collections.namedtuple(details_type.__name__, [fname for (fname, _) in details_type._fields_])
+    unpack_from = struct.Struct("<" + struct_format(details_type)).unpack_from
+    make = details_tuple._make
+
+    def parse(blob, offset=0):
+        return make(unpack_from(blob, offset))
+
+    return parse
+
+
+# Map from the event string code to the parser for its details.
+# Events that are not listed here carry no details.
+EventDetailsParsers = {
+    b"FTLP": _event_details_parser(FastestLap_V1),
+    b"RTMT": _event_details_parser(Retirement_V1),
+    b"TMPT": _event_details_parser(TeamMateInPits_V1),
+    b"RCWN": _event_details_parser(RaceWinner_V1),
+    b"PENA": _event_details_parser(Penalty_V1),
+    b"SPTP": _event_details_parser(SpeedTrap_V1),
+    b"STLG": _event_details_parser(StartLights_V1),
+    b"DTSV": _event_details_parser(DriveThroughPenaltyServed_V1),
+    b"SGSV": _event_details_parser(StopGoPenaltyServed_V1),
+    b"FLBK": _event_details_parser(Flashback_V1),
+    b"BUTN": _event_details_parser(Buttons_V1),
+}
+
+
+def parse_event_details(code: bytes, blob, offset: int = 0):
+    """Decode the event details of an event, according to its event string code.
+
+    Args:
+        code: the event string code.
+        blob: the buffer holding the event details.
+        offset: the offset of the event details within the buffer.
+
+    Returns:
+        A namedtuple mirroring the details structure for the event (e.g. SpeedTrap_V1), or None if the event has no
+        details.
+    """
+    parser = EventDetailsParsers.get(code)
+    return None if parser is None else parser(blob, offset)
+
+
 ###############################################################
 #                                                             #
 #  __________  Packet ID 4 : PARTICIPANTS PACKET  __________  #
@@ -1585,6 +1642,65 @@ InfringementTypes = {
 }
 
 
+def _frozen(id_map: dict) -> types.MappingProxyType:
+    """Return a read-only view of one of the maps above, with its ids in ascending order."""
+    return types.MappingProxyType(dict(sorted(id_map.items())))
+
+
+# The maps are constants, so only expose read-only views of them.
+TeamIDs = _frozen(TeamIDs)
+DriverIDs = _frozen(DriverIDs)
+TrackIDs = _frozen(TrackIDs)
+NationalityIDs = _frozen(NationalityIDs)
+GameModeIDs = _frozen(GameModeIDs)
+Ruleset_IDs = _frozen(Ruleset_IDs)
+SurfaceTypes = _frozen(SurfaceTypes)
+PenaltyTypes = _frozen(PenaltyTypes)
+InfringementTypes = _frozen(InfringementTypes)
+
+
+def _dense(id_map: dict) -> tuple:
+    """Return the values of one of the maps above as a tuple indexed by id, with None for unused ids."""
+    return tuple(id_map.get(value) for value in range(max(id_map) + 1))
+
+
+# The same maps as dense tuples: the ids are small non-negative integers, and indexing a tuple is cheaper than
+# hashing into a dict, e.g. TEAM_NAMES[participant.teamId] in a per-car loop. Check the id against the length first
+# if it may be out of range.
+TEAM_NAMES = _dense(TeamIDs)
+DRIVER_NAMES = _dense(DriverIDs)
+TRACK_NAMES = _dense(TrackIDs)
+NATIONALITIES = _dense(NationalityIDs)
+GAME_MODES = _dense(GameModeIDs)
+RULESETS = _dense(Ruleset_IDs)
+SURFACE_TYPES = _dense(SurfaceTypes)
+PENALTY_TYPES = _dense(PenaltyTypes)
+INFRINGEMENT_TYPES = _dense(InfringementTypes)
+
+
+def _id_lookup(table: tuple, id_map: dict, description: str):
+    """Return a function looking up an id in a dense table, falling back to the map for ids beyond its end."""
+    size = len(table)
+    get = id_map.get
+
+    def lookup(value: int):
+        return table[value] if 0 <= value < size else get(value)
+
+    lookup.__doc__ = "Return the {} for an id, or None if the id is unknown.".format(description)
+    return lookup
+
+
+team_name = _id_lookup(TEAM_NAMES, TeamIDs, "team name")
+driver_name = _id_lookup(DRIVER_NAMES, DriverIDs, "driver name")
+track_name = _id_lookup(TRACK_NAMES, TrackIDs, "track name")
+nationality = _id_lookup(NATIONALITIES, NationalityIDs, "nationality")
+game_mode = _id_lookup(GAME_MODES, GameModeIDs, "game mode")
+ruleset = _id_lookup(RULESETS, Ruleset_IDs, "ruleset")
+surface_type = _id_lookup(SURFACE_TYPES, SurfaceTypes, "surface type")
+penalty_type = _id_lookup(PENALTY_TYPES, PenaltyTypes, "penalty type")
+infringement_type = _id_lookup(INFRINGEMENT_TYPES, InfringementTypes, "infringement type")
+
+
 @enum.unique
 class ButtonFlag(enum.IntEnum):
     """Bit-mask values for the 'button' field in Car Telemetry Data packets."""
@@ -1622,41 +1738,97 @@ class ButtonFlag(enum.IntEnum):
     UDP_ACTION_11 = 0x40000000
     UDP_ACTION_12 = 0x80000000
 
+    def describe(self) -> str:
+        """Return the description of a button, e.g. "Cross or A" for CROSS.
+
+        This can also be called as ButtonFlag.describe(flag) with a plain int flag value; for a value with several
+        bits set, the lowest one is described.
+
+        Raises:
+            ValueError if the value has no button bit set, i.e. it is not a non-zero 32-bit mask.
+        """
+        if not 0 < self <= 0xFFFFFFFF:
+            raise ValueError("No button flag in {!r}.".format(self))
+        return _BUTTON_DESC[(self & -self).bit_length() - 1]
+
+    @classmethod
+    def from_word_fast(cls, buttons: int) -> tuple:
+        """Return the flags of all buttons pressed in a 'buttonStatus' bit-mask, lowest bit first.
+
+        Each byte of the mask is looked up in a precomputed table, rather than testing all 32 flags in turn.
+        """
+        (byte0, byte1, byte2, byte3) = _BUTTON_FLAGS_BY_BYTE
+        return (
+            byte0[buttons & 0xFF]
+            + byte1[(buttons >> 8) & 0xFF]
+            + byte2[(buttons >> 16) & 0xFF]
+            + byte3[(buttons >> 24) & 0xFF]
+        )
+
+
+# Description of each button, indexed by the bit position of its flag (see ButtonFlag.describe).
+_BUTTON_DESC = (
+    "Cross or A",  # CROSS
+    "Triangle or Y",  # TRIANGLE
+    "Circle or B",  # CIRCLE
+    "Square or X",  # SQUARE
+    "D-pad Left",  # D_PAD_LEFT
+    "D-pad Right",  # D_PAD_RIGHT
+    "D-pad Up",  # D_PAD_UP
+    "D-pad Down",  # D_PAD_DOWN
+    "Options or Menu",  # OPTIONS
+    "L1 or LB",  # L1
+    "R1 or RB",  # R1
+    "L2 or LT",  # L2
+    "R2 or RT",  # R2
+    "Left Stick Click",  # LEFT_STICK_CLICK
+    "Right Stick Click",  # RIGHT_STICK_CLICK
+    "Right Stick Left",  # RIGHT_STICK_LEFT
+    "Right Stick Right",  # RIGHT_STICK_RIGHT
+    "Right Stick Up",  # RIGHT_STICK_UP
+    "Right Stick Down",  # RIGHT_STICK_DOWN
+    "Special",  # SPECIAL
+    "UDP Action 1",  # UDP_ACTION_1
+    "UDP Action 2",  # UDP_ACTION_2
+    "UDP Action 3",  # UDP_ACTION_3
+    "UDP Action 4",  # UDP_ACTION_4
+    "UDP Action 5",  # UDP_ACTION_5
+    "UDP Action 6",  # UDP_ACTION_6
+    "UDP Action 7",  # UDP_ACTION_7
+    "UDP Action 8",  # UDP_ACTION_8
+    "UDP Action 9",  # UDP_ACTION_9
+    "UDP Action 10",  # UDP_ACTION_10
+    "UDP Action 11",  # UDP_ACTION_11
+    "UDP Action 12",  # UDP_ACTION_12
+)
+
+
+def _button_flags_by_value(byte: int) -> tuple:
+    """Return the tuple of flags set by each of the 256 values of one byte of a 'buttonStatus' bit-mask.
+
+    Each value's tuple is its lowest set flag followed by the tuple of the value without that bit, which has already
+    been built.
+    """
+    flags_by_value = [()]
+    for value in range(1, 256):
+        lowest_bit = value & -value
+        flags_by_value.append((ButtonFlag(lowest_bit << (8 * byte)),) + flags_by_value[value ^ lowest_bit])
+    return tuple(flags_by_value)
+
+
+_BUTTON_FLAGS_BY_BYTE = tuple(_button_flags_by_value(byte) for byte in range(4))
+
+
+def iter_pressed(buttons: int):
+    """Yield the flag of each button pressed in a 'buttonStatus' bit-mask, lowest bit first.
+
+    Only the set bits are visited, by repeatedly isolating the lowest one.
+    """
+    while buttons:
+        bit = buttons & -buttons
+        yield ButtonFlag(bit)
+        buttons ^= bit
 
-ButtonFlag.description = {
-    ButtonFlag.CROSS: "Cross or A",
-    ButtonFlag.TRIANGLE: "Triangle or Y",
-    ButtonFlag.CIRCLE: "Circle or B",
-    ButtonFlag.SQUARE: "Square or X",
-    ButtonFlag.D_PAD_LEFT: "D-pad Left",
-    ButtonFlag.D_PAD_RIGHT: "D-pad Right",
-    ButtonFlag.D_PAD_UP: "D-pad Up",
-    ButtonFlag.D_PAD_DOWN: "D-pad Down",
-    ButtonFlag.OPTIONS: "Options or Menu",
-    ButtonFlag.L1: "L1 or LB",
-    ButtonFlag.R1: "R1 or RB",
-    ButtonFlag.L2: "L2 or LT",
-    ButtonFlag.R2: "R2 or RT",
-    ButtonFlag.LEFT_STICK_CLICK: "Left Stick Click",
-    ButtonFlag.RIGHT_STICK_CLICK: "Right Stick Click",
-    ButtonFlag.RIGHT_STICK_LEFT: "Right Stick Left",
-    ButtonFlag.RIGHT_STICK_RIGHT: "Right Stick Right",
-    ButtonFlag.RIGHT_STICK_UP: "Right Stick Up",
-    ButtonFlag.RIGHT_STICK_DOWN: "Right Stick Down",
-    ButtonFlag.SPECIAL: "Special",
-    ButtonFlag.UDP_ACTION_1: "UDP Action 1",
-    ButtonFlag.UDP_ACTION_2: "UDP Action 2",
-    ButtonFlag.UDP_ACTION_3: "UDP Action 3",
-    ButtonFlag.UDP_ACTION_4: "UDP Action 4",
-    ButtonFlag.UDP_ACTION_5: "UDP Action 5",
-    ButtonFlag.UDP_ACTION_6: "UDP Action 6",
-    ButtonFlag.UDP_ACTION_7: "UDP Action 7",
-    ButtonFlag.UDP_ACTION_8: "UDP Action 8",
-    ButtonFlag.UDP_ACTION_9: "UDP Action 9",
-    ButtonFlag.UDP_ACTION_10: "UDP Action 10",
-    ButtonFlag.UDP_ACTION_11: "UDP Action 11",
-    ButtonFlag.UDP_ACTION_12: "UDP Action 12",
-}
 
 ##################################
 #                                #
@@ -1680,26 +1852,243 @@ HeaderFieldsToPacketType = {
     (2022, 1, 11): PacketSessionHistoryData_V1,
 }
 
+# Packet sizes in bytes, as given by the UDP specification.
+EXPECTED_SIZES_V1 = {
+    PacketMotionData_V1: 1464,
+    PacketSessionData_V1: 632,
+    PacketLapData_V1: 972,
+    PacketEventData_V1: 40,
+    PacketParticipantsData_V1: 1257,
+    PacketCarSetupData_V1: 1102,
+    PacketCarTelemetryData_V1: 1347,
+    PacketCarStatusData_V1: 1058,
+    PacketFinalClassificationData_V1: 1015,
+    PacketLobbyInfoData_V1: 1191,
+    PacketCarDamageData_V1: 948,
+    PacketSessionHistoryData_V1: 1155,
+}
+
+# Check the structure definitions against the specification once, at import.
+assert all(packet_type.SIZE == size for (packet_type, size) in EXPECTED_SIZES_V1.items())
+
+# The packetFormat and packetVersion header fields shared by all the packet types above.
+PACKET_FORMAT = 2022
+PACKET_VERSION = 1
+
+# HeaderFieldsToPacketType, giving both the packet type and its expected size in bytes.
+HeaderFieldsToPacketTypeAndSize = {
+    key: (packet_type, EXPECTED_SIZES_V1[packet_type]) for (key, packet_type) in HeaderFieldsToPacketType.items()
+}
 
-#########################################################################
-#                                                                       #
-#  Verify packet sizes if this module is executed rather than imported  #
-#                                                                       #
-#########################################################################
-
-if __name__ == "__main__":
-
-    # Check all the packet sizes.
-
-    assert ctypes.sizeof(PacketMotionData_V1) == 1464
-    assert ctypes.sizeof(PacketSessionData_V1) == 632
-    assert ctypes.sizeof(PacketLapData_V1) == 972
-    assert ctypes.sizeof(PacketEventData_V1) == 40
-    assert ctypes.sizeof(PacketParticipantsData_V1) == 1257
-    assert ctypes.sizeof(PacketCarSetupData_V1) == 1102
-    assert ctypes.sizeof(PacketCarTelemetryData_V1) == 1347
-    assert ctypes.sizeof(PacketCarStatusData_V1) == 1058
-    assert ctypes.sizeof(PacketFinalClassificationData_V1) == 1015
-    assert ctypes.sizeof(PacketLobbyInfoData_V1) == 1191
-    assert ctypes.sizeof(PacketCarDamageData_V1) == 948
-    assert ctypes.sizeof(PacketSessionHistoryData_V1) == 1155
+# Size of the PacketHeader at the start of every packet, in bytes.
+HEADER_SIZE = PacketHeader.SIZE
+
+# The same packet types indexed directly by packet id, which is a dense range starting at 0.
+PACKET_TYPE_BY_ID = (
+    PacketMotionData_V1,
+    PacketSessionData_V1,
+    PacketLapData_V1,
+    PacketEventData_V1,
+    PacketParticipantsData_V1,
+    PacketCarSetupData_V1,
+    PacketCarTelemetryData_V1,
+    PacketCarStatusData_V1,
+    PacketFinalClassificationData_V1,
+    PacketLobbyInfoData_V1,
+    PacketCarDamageData_V1,
+    PacketSessionHistoryData_V1,
+)
+
+# Expected packet size in bytes, indexed by packet id.
+PACKET_SIZE_BY_ID = tuple(EXPECTED_SIZES_V1[packet_type] for packet_type in PACKET_TYPE_BY_ID)
+
+# Functions decoding a raw UDP packet into its packet structure, indexed by packet id: PARSERS[packet[5]](packet).
+# These do not validate the packet; check len(packet) against PACKET_SIZE_BY_ID first.
+PARSERS = tuple(packet_type.from_buffer_copy for packet_type in PACKET_TYPE_BY_ID)
+
+
+# Precompiled parsers for the fields following the header of each packet type, indexed by packet id. As with
+# struct_format(), nested structures are flattened and arrays are expanded, so a packet's values are read with a
+# single call: FIELDS_STRUCT_BY_ID[packet_id].unpack_from(packet, HEADER_SIZE).
+FIELDS_STRUCT_BY_ID = tuple(
+    struct.Struct("<" + "".join(struct_format(ftype) for (_, ftype) in packet_type._fields_[1:]))
+    for packet_type in PACKET_TYPE_BY_ID
+)
+
+_fields_tuple_types = {}
+
+
+def fields_tuple_type(packet_id: int) -> type:
+    """Return a namedtuple type for the values unpacked by FIELDS_STRUCT_BY_ID[packet_id].
+
+    The field names are the flattened packet field names: nested field names are joined with '_' and array elements
+    are numbered, e.g. carTelemetryData_0_speed or carTelemetryData_0_tyresPressure_3. As these types have hundreds
+    of fields, each one is only created when first needed.
+    """
+    tuple_type = _fields_tuple_types.get(packet_id)
+    if tuple_type is None:
+        packet_type = PACKET_TYPE_BY_ID[packet_id]
+        names = [name for (fname, ftype) in packet_type._fields_[1:] for name in _flat_field_names(ftype, fname)]
+        tuple_type = _fields_tuple_types[packet_id] = collections.namedtuple(packet_type.__name__ + "Fields", names)
+    return tuple_type
+
+
+def _flat_field_names(ctype, name: str) -> list:
+    if issubclass(ctype, ctypes.Array) and ctype._type_ is not ctypes.c_char:
+        return [
+            flat_name
+            for index in range(ctype._length_)
+            for flat_name in _flat_field_names(ctype._type_, "{}_{}".format(name, index))
+        ]
+    if issubclass(ctype, ctypes.Structure):
+        return [
+            flat_name
+            for (fname, ftype) in ctype._fields_
+            for flat_name in _flat_field_names(ftype, "{}_{}".format(name, fname))
+        ]
+    return [name]
+
+
+# Precompiled parser for the PacketHeader fields, in declaration order.
+HEADER_STRUCT = struct.Struct("<HBBBBQfIBB")
+
+assert HEADER_STRUCT.size == PacketHeader.SIZE
+
+# Precompiled parser for just the header fields that select the packet type: (packetFormat, packetVersion, packetId).
+# The gameMajorVersion and gameMinorVersion bytes in between are skipped.
+HEADER_KEY_STRUCT = struct.Struct("<H2xBB")
+
+assert HEADER_KEY_STRUCT.size == PacketHeader.packetId.offset + 1
+
+
+def peek_packet_id(packet: bytes) -> int:
+    """Return the packetId header field of a raw UDP packet without decoding the rest of the header."""
+    return packet[HEADER_OFF_PACKET_ID]
+
+
+def unpack_header(packet: bytes) -> tuple:
+    """Return the header fields of a raw UDP packet as a tuple, in PacketHeader field order.
+
+    This avoids creating a PacketHeader instance; use PacketHeader.from_buffer_copy() if a structure is needed.
+    """
+    return HEADER_STRUCT.unpack_from(packet, 0)
+
+
+# Offsets of the event string code and event details within a raw event packet.
+EVENT_CODE_OFFSET = PacketEventData_V1.eventStringCode.offset
+EVENT_DETAILS_OFFSET = PacketEventData_V1.eventDetails.offset
+
+# Events whose details consist of a single uint8 (a vehicle index, or the number of start lights).
+_ONE_BYTE_EVENTS = frozenset({b"RTMT", b"TMPT", b"RCWN", b"DTSV", b"SGSV", b"STLG"})
+
+
+def unpack_event(packet: bytes) -> tuple:
+    """Return the event string code and the event details of a raw event packet.
+
+    For the common events whose details are a single byte, that byte is returned as an int. The remaining events
+    are decoded with parse_event_details().
+    """
+    code = bytes(packet[EVENT_CODE_OFFSET:EVENT_DETAILS_OFFSET])
+    if code in _ONE_BYTE_EVENTS:
+        return (code, packet[EVENT_DETAILS_OFFSET])
+    return (code, parse_event_details(code, packet, EVENT_DETAILS_OFFSET))
+
+
+# Precompiled parsers for the small fields before or after the car arrays of some packets, so that these can be
+# read from a raw packet without decoding the whole packet:
+# - the (mfdPanelIndex, mfdPanelIndexSecondaryPlayer, suggestedGear) tail of a car telemetry packet;
+# - the (carIdx, numLaps, numTyreStints, bestLapTimeLapNum, bestSector1LapNum, bestSector2LapNum, bestSector3LapNum)
+#   prefix of a session history packet.
+# The numCars field of a final classification packet is a single byte: packet[FINAL_CLASSIFICATION_NUM_CARS_OFFSET].
+TELEMETRY_TAIL_STRUCT = struct.Struct("<BBb")
+TELEMETRY_TAIL_OFFSET = PacketCarTelemetryData_V1.mfdPanelIndex.offset
+SESSION_HISTORY_PREFIX_STRUCT = struct.Struct("<7B")
+SESSION_HISTORY_PREFIX_OFFSET = PacketSessionHistoryData_V1.carIdx.offset
+FINAL_CLASSIFICATION_NUM_CARS_OFFSET = PacketFinalClassificationData_V1.numCars.offset
+
+assert TELEMETRY_TAIL_OFFSET + TELEMETRY_TAIL_STRUCT.size == PacketCarTelemetryData_V1.SIZE
+assert (
+    SESSION_HISTORY_PREFIX_OFFSET + SESSION_HISTORY_PREFIX_STRUCT.size
+    == PacketSessionHistoryData_V1.lapHistoryData.offset
+)
+
+
+def unpack_telemetry_tail(packet: bytes) -> tuple:
+    """Return the (mfdPanelIndex, mfdPanelIndexSecondaryPlayer, suggestedGear) fields of a raw car telemetry packet."""
+    return TELEMETRY_TAIL_STRUCT.unpack_from(packet, TELEMETRY_TAIL_OFFSET)
+
+
+def unpack_session_history_prefix(packet: bytes) -> tuple:
+    """Return the fields preceding the lap history array of a raw session history packet, in field order."""
+    return SESSION_HISTORY_PREFIX_STRUCT.unpack_from(packet, SESSION_HISTORY_PREFIX_OFFSET)
+
+
+###################################
+#                                 #
+#  Field offsets and raw formats  #
+#                                 #
+###################################
+
+# All the structure types defined in this module, in definition order.
+STRUCTURE_TYPES = (
+    PacketHeader,
+    CarMotionData_V1,
+    PacketMotionData_V1,
+    MarshalZone_V1,
+    WeatherForecastSample_V1,
+    PacketSessionData_V1,
+    LapData_V1,
+    PacketLapData_V1,
+    FastestLap_V1,
+    Retirement_V1,
+    TeamMateInPits_V1,
+    RaceWinner_V1,
+    Penalty_V1,
+    SpeedTrap_V1,
+    StartLights_V1,
+    DriveThroughPenaltyServed_V1,
+    StopGoPenaltyServed_V1,
+    Flashback_V1,
+    Buttons_V1,
+    PacketEventData_V1,
+    ParticipantData_V1,
+    PacketParticipantsData_V1,
+    CarSetupData_V1,
+    PacketCarSetupData_V1,
+    CarTelemetryData_V1,
+    PacketCarTelemetryData_V1,
+    CarStatusData_V1,
+    PacketCarStatusData_V1,
+    FinalClassificationData_V1,
+    PacketFinalClassificationData_V1,
+    LobbyInfoData_V1,
+    PacketLobbyInfoData_V1,
+    CarDamageData_V1,
+    PacketCarDamageData_V1,
+    LapHistoryData_V1,
+    TyreStintHistoryData_V1,
+    PacketSessionHistoryData_V1,
+)
+
+# For every structure type in this module, map each field name to its byte offset within the structure (OFFSETS)
+# and to the struct format that decodes it (FMTS).
+# Together these allow reading single fields from a raw packet without creating any ctypes object, e.g.
+#
+#     struct.unpack_from(FMTS[PacketHeader]["sessionTime"], packet, OFFSETS[PacketHeader]["sessionTime"])
+
+OFFSETS = {}
+FMTS = {}
+
+for _type in STRUCTURE_TYPES:
+    OFFSETS[_type] = {fname: getattr(_type, fname).offset for (fname, _) in _type._fields_}
+    FMTS[_type] = {fname: "<" + struct_format(ftype) for (fname, ftype) in _type._fields_}
+del _type
+
+# Shorthands for frequently read fields: e.g. packet[HEADER_OFF_PACKET_ID] replaces building a PacketHeader, and
+# the current lap number of car i is packet[LAPDATA_OFF + i * LAPDATA_STRIDE + LAPDATA_OFF_CURRENT_LAP_NUM].
+HEADER_OFF_PACKET_ID = PacketHeader.packetId.offset
+HEADER_OFF_SESSION_TIME = PacketHeader.sessionTime.offset
+HEADER_OFF_PLAYER_CAR_INDEX = PacketHeader.playerCarIndex.offset
+LAPDATA_OFF = PacketLapData_V1.lapData.offset
+LAPDATA_STRIDE = LapData_V1.SIZE
+LAPDATA_OFF_CURRENT_LAP_NUM = LapData_V1.currentLapNum.offset
@@ -0,0 +1,93 @@
+"""Receive raw telemetry packets from a UDP socket without allocating a new
+bytes object per datagram.
+"""
+
+import socket
+
+
+class PacketReceiver():
+    """Receives UDP datagrams into a ring of preallocated buffers.
+
+    Each packet is returned as a memoryview on one of the buffers, which can be
+    passed straight to the unpacking functions of this package. A packet stays
+    valid until the receiver cycles back round to its buffer, i.e. for the next
+    num_buffers - 1 receives; copy (or unpack) it before then if it is needed
+    for longer.
+    """
+
+    def __init__(
+        self,
+        udp_socket: socket.socket,
+        num_buffers: int = 32,
+        buffer_size: int = 2048,
+    ):
+        self._socket = udp_socket
+        self._buffers = [bytearray(buffer_size) for _ in range(num_buffers)]
+        self._views = [memoryview(buffer) for buffer in self._buffers]
+        self._index = 0
+
+    def receive(self) -> memoryview:
+        """Block until a datagram arrives and return its contents."""
+        return self.receive_from()[0]
+
+    def receive_from(self) -> tuple:
+        """Block until a datagram arrives and return its contents together with
+        the sender's address.
+        """
+        index = self._index
+        self._index = (index + 1) % len(self._buffers)
+        (nbytes, address) = self._socket.recvfrom_into(self._buffers[index])
+        return (self._views[index][:nbytes], address)
+
+    def drain(self, max_packets: int = 32) -> list:
+        """Block until a datagram arrives, then also receive the datagrams
+        already queued on the socket.
+
+        This returns a whole burst of packets (e.g. all the packets the game
+        sends for one frame) in one call, so that they can be unpacked together
+        in a tight loop. Each packet is a memoryview as returned by receive();
+        pass it with its size to UDPUnpacker.unpack_udp_packet_into(), as in
+        unpack_udp_packet_into(p, len(p)), to decode it without a copy.
+
+        Args:
+            max_packets: the maximum number of packets returned; at least 1,
+                and at most the number of buffers of the receiver, so that no
+                packet is overwritten by a later one in the same burst.
+
+        Returns:
+            The packets, in the order received.
+
+        Raises:
+            ValueError if max_packets is out of range.
+        """
+        if max_packets < 1:
+            raise ValueError(
+                "Cannot drain {} packets; at least 1 is needed.".format(
+                    max_packets
+                )
+            )
+        if max_packets > len(self._buffers):
+            raise ValueError(
+                "Cannot drain {} packets with {} receive buffers.".format(
+                    max_packets, len(self._buffers)
+                )
+            )
+        packets = [self.receive()]
+        timeout = self._socket.gettimeout()
+        self._socket.setblocking(False)
+        try:
+            while len(packets) < max_packets:
+                index = self._index
+                try:
+                    nbytes = self._socket.recv_into(self._buffers[index])
+                except BlockingIOError:
+                    break
+                self._index = (index + 1) % len(self._buffers)
+                packets.append(self._views[index][:nbytes])
+        finally:
+            self._socket.settimeout(timeout)
+        return packets
+
+    def __iter__(self):
+        while True:
+            yield self.receive()
@@ -1,27 +1,180 @@
-import ctypes
+import collections
+import contextlib
 
-from .packets import PacketHeader
 from .packets import HeaderFieldsToPacketType
+from .packets import HeaderFieldsToPacketTypeAndSize
+from .packets import FIELDS_STRUCT_BY_ID
+from .packets import fields_tuple_type
+from .packets import HEADER_SIZE
+from .packets import HEADER_KEY_STRUCT
+from .packets import HEADER_OFF_PACKET_ID
+from .packets import PACKET_FORMAT
+from .packets import PACKET_SIZE_BY_ID
+from .packets import PACKET_TYPE_BY_ID
+from .packets import PACKET_VERSION
 from .packed_little_endian import PackedLittleEndianStructure
 
+
 class UnpackError(Exception):
     pass
 
 
+# The raise statements of the packet checks, kept out of the checking functions
+# so that these stay short.
+
+
+def _raise_too_short(actual_packet_size: int):
+    raise UnpackError(
+        f"Bad telemetry packet: too short ({actual_packet_size} bytes)."
+    )
+
+
+def _raise_bad_key(key: tuple):
+    raise UnpackError(
+        f"Bad telemetry packet: no match for key fields {key!r}."
+    )
+
+
+def _raise_bad_size(
+    packet_type: type, expected_packet_size: int, actual_packet_size: int
+):
+    raise UnpackError(
+        f"Bad telemetry packet: bad size for {packet_type.__name__} packet; "
+        f"expected {expected_packet_size} bytes "
+        f"but received {actual_packet_size} bytes."
+    )
+
+
+def packet_type_for(packet: bytes, nbytes: int = None) -> type:
+    """Return the packet type of a raw UDP packet, after checking that the
+    packet matches it.
+
+    This is the single place where packets are validated; every unpacking
+    function of this package reports problems through it.
+
+    Args:
+        packet: the contents of the UDP packet; or, if nbytes is given, a
+            larger buffer holding the packet at its start.
+        nbytes: the size of the packet; by default, the size of packet. It
+            cannot be larger than packet.
+
+    Returns:
+        The packet structure type selected by the header fields.
+
+    Raises:
+        UnpackError if a problem is detected.
+    """
+    buffer_size = len(packet)
+    actual_packet_size = buffer_size if nbytes is None else nbytes
+
+    if actual_packet_size < HEADER_SIZE:
+        _raise_too_short(actual_packet_size)
+
+    if buffer_size < HEADER_SIZE:
+        _raise_too_short(buffer_size)
+
+    (_, _, packet_id) = key = HEADER_KEY_STRUCT.unpack_from(packet)
+    packet_type = HeaderFieldsToPacketType.get(key)
+
+    if packet_type is None:
+        _raise_bad_key(key)
+
+    expected_packet_size = PACKET_SIZE_BY_ID[packet_id]
+
+    if actual_packet_size != expected_packet_size:
+        _raise_bad_size(packet_type, expected_packet_size, actual_packet_size)
+
+    # nbytes was larger than the buffer.
+    if buffer_size < expected_packet_size:
+        _raise_bad_size(packet_type, expected_packet_size, buffer_size)
+
+    return packet_type
+
+
+def assert_size(packet_id: int, size: int) -> None:
+    """Check a packet size against the expected size for its packet id.
+
+    Raises:
+        UnpackError if the packet id is unknown or the size does not match.
+    """
+    if not 0 <= packet_id < len(PACKET_SIZE_BY_ID):
+        raise UnpackError(
+            f"Bad telemetry packet: unknown packet id {packet_id!r}."
+        )
+    expected_packet_size = PACKET_SIZE_BY_ID[packet_id]
+    if expected_packet_size != size:
+        packet_type = PACKET_TYPE_BY_ID[packet_id]
+        _raise_bad_size(packet_type, expected_packet_size, size)
+
+
 class UDPUnpacker():
-    def __init__(self):
-        self._PacketHeader = PacketHeader
-        self._HeaderFieldsToPacketType = HeaderFieldsToPacketType
+    # The number of structures per packet type used in turn by
+    # unpack_udp_packet_reuse().
+    REUSE_RING_SIZE = 4
+
+    def __init__(self, udp_spec: int = 22):
+        """Create an unpacker for the UDP telemetry format of a game year.
+
+        Args:
+            udp_spec: the game year of the UDP specification, e.g. 22 for F1 22
+                (the only one supported for now).
+
+        Raises:
+            ValueError if the UDP specification is not supported.
+        """
+        if 2000 + udp_spec != PACKET_FORMAT:
+            raise ValueError(
+                f"Unsupported UDP specification {udp_spec!r}; "
+                f"supported: {PACKET_FORMAT - 2000}."
+            )
+        self._udp_spec = udp_spec
+        # The packet format and version are the same for all packets, so the
+        # packet type and size can be looked up by packet id alone once these
+        # have been checked.
+        self._packet_format = PACKET_FORMAT
+        self._packet_version = PACKET_VERSION
+        self._PacketTypeAndSizeById = tuple(
+            HeaderFieldsToPacketTypeAndSize[
+                (self._packet_format, self._packet_version, packet_id)
+            ]
+            for packet_id in range(len(HeaderFieldsToPacketTypeAndSize))
+        )
+        # For the fast path of unpack_udp_packet(): a function specialised for
+        # each packet id, indexed by the packet id byte. Ids without a packet
+        # type go straight to the step-by-step checks.
+        self._unpackers = [self._unpack_checked] * 256
+        for (packet_id, (packet_type, size)) in enumerate(
+            self._PacketTypeAndSizeById
+        ):
+            key = (self._packet_format, self._packet_version, packet_id)
+            self._unpackers[packet_id] = _make_unpacker(
+                packet_type, size, key, self._unpack_checked
+            )
+        # For unpack_udp_packet_reuse(): a ring of structures per packet id,
+        # created on first use of that packet id, and the next slot of each.
+        self._reuse_rings = [None] * len(self._PacketTypeAndSizeById)
+        self._reuse_next = [0] * len(self._reuse_rings)
 
     @property
-    def udp_spec(self):
-        return self._udp_spec 
-    
-    def unpack_udp_packet(self, packet: bytes) -> PackedLittleEndianStructure:
+    def udp_spec(self) -> int:
+        """The game year of the UDP specification, e.g. 22 for F1 22."""
+        return self._udp_spec
+
+    def unpack_udp_packet(
+        self, packet: bytes, nbytes: int = None
+    ) -> PackedLittleEndianStructure:
         """Convert raw UDP packet to an appropriately-typed telemetry packet.
 
+        Only the header key fields are read before the packet type is known,
+        and the packet is then copied once, straight from the given buffer.
+
         Args:
-            packet: the contents of the UDP packet to be unpacked.
+            packet: the contents of the UDP packet to be unpacked (bytes,
+                bytearray or memoryview); or, if nbytes is given, a larger
+                receive buffer holding the packet at its start.
+            nbytes: the size of the packet, as returned by socket.recv_into();
+                by default, the size of packet. Passing the receive buffer with
+                its fill size avoids slicing the buffer.
 
         Returns:
             The decoded packet structure.
@@ -29,32 +182,299 @@ class UDPUnpacker():
         Raises:
             UnpackError if a problem is detected.
         """
-        actual_packet_size = len(packet)
+        if nbytes is None:
+            nbytes = len(packet)
+        # The specialised unpacker checks the exact packet size, which covers
+        # packets shorter than a header; only a packet too short to hold the
+        # packet id byte needs catching here. Indexing the packet id byte to
+        # pick the unpacker is as fast as unpacking all the key fields first,
+        # and those are then read with a single HEADER_KEY_STRUCT call by the
+        # unpacker.
+        try:
+            unpack = self._unpackers[packet[HEADER_OFF_PACKET_ID]]
+        except IndexError:
+            return self._unpack_checked(packet, nbytes)
+        return unpack(packet, nbytes)
 
-        header_size = ctypes.sizeof(self._PacketHeader)
+    def unpack_udp_packet_into(
+        self, buf: bytearray, nbytes: int
+    ) -> PackedLittleEndianStructure:
+        """Convert a raw UDP packet received into a buffer to a telemetry
+        packet that shares the buffer's memory.
 
-        if actual_packet_size < header_size:
-            raise UnpackError(
-                "Bad telemetry packet: too short ({} bytes).".format(actual_packet_size)
-            )
+        Unlike unpack_udp_packet(), the packet is not copied: this pairs with
+        socket.recv_into(buf), so that a receive loop can decode packets with
+        no allocation or copy of their contents. The returned structure is only
+        valid while the buffer holds this packet; it changes as soon as another
+        packet is received into the buffer, so copy out any values that need to
+        be kept. The buffer cannot be resized while the structure exists.
+
+        Args:
+            buf: a writable buffer holding the packet at its start, e.g. a
+                bytearray.
+            nbytes: the size of the packet, as returned by recv_into().
+
+        Returns:
+            The decoded packet structure, viewing the buffer.
+
+        Raises:
+            UnpackError if a problem is detected.
+        """
+        return packet_type_for(buf, nbytes).from_buffer(buf)
 
-        header = self._PacketHeader.from_buffer_copy(packet)
-        key = (header.packetFormat, header.packetVersion, header.packetId)
+    def unpack_udp_packet_reuse(
+        self, packet: bytes, nbytes: int = None
+    ) -> PackedLittleEndianStructure:
+        """Convert raw UDP packet to a telemetry packet, refilling a
+        preallocated structure rather than creating one.
 
-        if key not in self._HeaderFieldsToPacketType:
-            raise UnpackError(
-                "Bad telemetry packet: no match for key fields {!r}.".format(key)
+        The structures of each packet type are used in turn from a ring of
+        REUSE_RING_SIZE, so the returned structure stays valid until
+        REUSE_RING_SIZE more packets of the same type have been unpacked by
+        this method; copy out any values that need to be kept for longer. In
+        exchange, no structure is allocated per packet, once the ring of the
+        packet type has been created by its first packet.
+
+        Unlike PacketPool, structures are not handed back: each one is simply
+        overwritten when its turn in the ring comes round again. Use a
+        PacketPool where a packet must be kept for an unknown time, e.g. until
+        another thread has processed it.
+
+        Args:
+            packet: the contents of the UDP packet to be unpacked, or a larger
+                buffer as for unpack_udp_packet().
+            nbytes: the size of the packet; by default, the size of packet.
+
+        Returns:
+            The decoded packet structure.
+
+        Raises:
+            UnpackError if a problem is detected.
+        """
+        packet_type = packet_type_for(packet, nbytes)
+        packet_id = packet[HEADER_OFF_PACKET_ID]
+        ring = self._reuse_rings[packet_id]
+        if ring is None:
+            ring = self._reuse_rings[packet_id] = tuple(
+                packet_type() for _ in range(self.REUSE_RING_SIZE)
             )
+        index = self._reuse_next[packet_id]
+        self._reuse_next[packet_id] = (index + 1) % self.REUSE_RING_SIZE
+        slot = ring[index]
+        slot.fill_from(packet)
+        return slot
 
-        packet_type = self._HeaderFieldsToPacketType[key]
+    def unpack_udp_packet_fast(
+        self, packet: bytes, nbytes: int = None
+    ) -> tuple:
+        """Convert raw UDP packet to a flat namedtuple of its values, rather
+        than a ctypes structure.
 
-        expected_packet_size = ctypes.sizeof(packet_type)
+        All the values following the header are decoded by a single precompiled
+        struct.Struct call, so reading them afterwards is plain tuple indexing,
+        much cheaper than ctypes field access. See fields_tuple_type() for the
+        field names, e.g. result.carTelemetryData_0_speed.
+
+        Args:
+            packet: the contents of the UDP packet to be unpacked, or a larger
+                buffer as for unpack_udp_packet().
+            nbytes: the size of the packet; by default, the size of packet.
 
-        if actual_packet_size != expected_packet_size:
-            raise UnpackError(
-                "Bad telemetry packet: bad size for {} packet; expected {} bytes but received {} bytes.".format(
-                    packet_type.__name__, expected_packet_size, actual_packet_size
-                )
+        Returns:
+            The packet values following the header, as a namedtuple.
+
+        Raises:
+            UnpackError if a problem is detected.
+        """
+        packet_type_for(packet, nbytes)
+        packet_id = packet[HEADER_OFF_PACKET_ID]
+        fields_struct = FIELDS_STRUCT_BY_ID[packet_id]
+        values = fields_struct.unpack_from(packet, HEADER_SIZE)
+        return fields_tuple_type(packet_id)._make(values)
+
+    def unpack_udp_packet_np(self, packet: bytes, nbytes: int = None):
+        """Convert raw UDP packet to a NumPy record, not a ctypes structure.
+
+        The record views the packet buffer without copying it, and its car
+        arrays are columns: e.g. for a car telemetry packet,
+        record['carTelemetryData']['speed'] is a uint16[22]. This requires
+        NumPy (see the arrays module).
+
+        Args:
+            packet: the contents of the UDP packet to be unpacked, or a larger
+                buffer as for unpack_udp_packet().
+            nbytes: the size of the packet; by default, the size of packet.
+
+        Returns:
+            The decoded packet, as a numpy.void structured scalar.
+
+        Raises:
+            UnpackError if a problem is detected.
+        """
+        # NumPy is an optional dependency, so the arrays module is only
+        # imported when this is used.
+        from .arrays import parse_packet
+
+        return parse_packet(packet, nbytes)
+
+    def _unpack_checked(
+        self, packet, nbytes: int
+    ) -> PackedLittleEndianStructure:
+        """Check a packet step by step, raising UnpackError with what is wrong
+        with it, and copy it.
+        """
+        return packet_type_for(packet, nbytes).from_buffer_copy(packet)
+
+
+def _make_unpacker(packet_type: type, size: int, key: tuple, unpack_checked):
+    """Return a function copying a raw UDP packet of the given packet type,
+    specialised for that type.
+
+    A packet of the expected size and key fields is copied straight away; any
+    other packet is passed on to unpack_checked, which reports the problem.
+    """
+    parse = packet_type.from_buffer_copy
+    unpack_key = HEADER_KEY_STRUCT.unpack_from
+
+    def unpack(packet, nbytes: int) -> PackedLittleEndianStructure:
+        if nbytes == size and unpack_key(packet) == key:
+            try:
+                return parse(packet)
+            except ValueError:
+                # The buffer is shorter than nbytes.
+                pass
+        return unpack_checked(packet, nbytes)
+
+    return unpack
+
+
+class PacketPool():
+    """A pool of preallocated packet structures that are refilled in place from
+    raw UDP packets.
+
+    This avoids allocating a new structure for every packet received. Packets
+    are borrowed from the pool with borrow(), and the borrowed structure is
+    only valid inside the with-block: once it is returned to the pool it will
+    be overwritten by a later packet of the same type, so copy out any values
+    that need to be kept. Where a with-block does not fit, use acquire() and
+    release() instead.
+    """
+
+    def __init__(self, size: int = 64):
+        """Create an empty pool.
+
+        Args:
+            size: the number of structures preallocated for each packet type,
+                on the first packet of that type. More are created if they run
+                out.
+        """
+        self._size = size
+        # The free structures by packet type, and the structures handed out by
+        # acquire() by id.
+        self._free = {}
+        self._in_use = {}
+
+    def acquire(self, packet: bytes) -> PackedLittleEndianStructure:
+        """Fill a pooled structure of the right type from a raw UDP packet.
+
+        The structure must be handed back with release() once it is no longer
+        used; borrow() does this automatically.
+
+        Args:
+            packet: the contents of the UDP packet to be unpacked.
+
+        Returns:
+            The pooled packet structure.
+
+        Raises:
+            UnpackError if a problem is detected.
+        """
+        packet_type = packet_type_for(packet)
+        free = self._free.get(packet_type)
+        if free is None:
+            free = self._free[packet_type] = collections.deque(
+                packet_type() for _ in range(self._size)
             )
+        slot = free.popleft() if free else packet_type()
+        slot.fill_from(packet)
+        self._in_use[id(slot)] = slot
+        return slot
+
+    def release(self, slot: PackedLittleEndianStructure) -> None:
+        """Return a structure obtained from acquire() to the pool, for reuse by
+        a later packet of the same type.
+
+        Raises:
+            ValueError if the structure was not acquired from this pool, or
+                has already been released.
+        """
+        if self._in_use.pop(id(slot), None) is not slot:
+            raise ValueError(
+                f"{type(slot).__name__} structure not acquired from this pool "
+                f"or already released."
+            )
+        self._free[type(slot)].append(slot)
+
+    def parse_burst(self, buffer) -> list:
+        """Fill pooled structures from a buffer holding several consecutive raw
+        packets.
+
+        This decodes a batch of datagrams received into one buffer, or a chunk
+        of a capture file (pass a memoryview of a mmap to avoid reading the
+        file into memory). Each packet's id is read from its header to find its
+        size, and the packet is copied from the buffer into a pooled structure
+        without any intermediate bytes object.
 
-        return packet_type.from_buffer_copy(packet)
+        Args:
+            buffer: the concatenated packets.
+
+        Returns:
+            The pooled packet structures, in buffer order. Hand each back with
+            release() once it is no longer used.
+
+        Raises:
+            UnpackError if a problem is detected; the structures filled so far
+                are returned to the pool.
+        """
+        view = memoryview(buffer).cast("B")
+        num_packet_ids = len(PACKET_SIZE_BY_ID)
+        slots = []
+        offset = 0
+        try:
+            while offset < len(view):
+                remaining = view[offset:]
+                size = len(remaining)
+                # Unknown ids and truncated packets are passed on whole, for
+                # acquire() to report.
+                if size > HEADER_OFF_PACKET_ID:
+                    packet_id = remaining[HEADER_OFF_PACKET_ID]
+                    if packet_id < num_packet_ids:
+                        size = min(size, PACKET_SIZE_BY_ID[packet_id])
+                slots.append(self.acquire(remaining[:size]))
+                offset += size
+        except UnpackError:
+            for slot in slots:
+                self.release(slot)
+            raise
+        return slots
+
+    @contextlib.contextmanager
+    def borrow(self, packet: bytes):
+        """Fill a pooled structure of the appropriate type from a raw UDP
+        packet, for the duration of a with-block.
+
+        Args:
+            packet: the contents of the UDP packet to be unpacked.
+
+        Yields:
+            The pooled packet structure, which is returned to the pool when the
+            with-block exits.
+
+        Raises:
+            UnpackError if a problem is detected.
+        """
+        slot = self.acquire(packet)
+        try:
+            yield slot
+        finally:
+            self.release(slot)
@@ -0,0 +1,27 @@
+import pytest
+
+from f1_ps_telemetry.packets import PACKET_FORMAT
+from f1_ps_telemetry.packets import PACKET_TYPE_BY_ID
+from f1_ps_telemetry.packets import PACKET_VERSION
+from f1_ps_telemetry.packets import PacketHeader
+
+
+def make_packet(packet_id: int, seed: int = 0) -> bytes:
+    """Return a valid raw packet of the given packet id.
+
+    The body is a byte pattern that varies with the seed. All its bytes are
+    below 0x40, so that no float field decodes as NaN or infinity.
+    """
+    size = PACKET_TYPE_BY_ID[packet_id].SIZE
+    packet = bytearray((7 * i + seed) % 0x40 for i in range(size))
+    header = PacketHeader.from_buffer(packet)
+    header.packetFormat = PACKET_FORMAT
+    header.packetVersion = PACKET_VERSION
+    header.packetId = packet_id
+    del header
+    return bytes(packet)
+
+
+@pytest.fixture(name="make_packet")
+def make_packet_fixture():
+    return make_packet
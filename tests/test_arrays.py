@@ -0,0 +1,398 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from f1_ps_telemetry.arrays import LapDataColumns  # noqa: E402
+from f1_ps_telemetry.arrays import MotionColumns  # noqa: E402
+from f1_ps_telemetry.arrays import PACKET_DTYPE_BY_ID  # noqa: E402
+from f1_ps_telemetry.arrays import TelemetryRing  # noqa: E402
+from f1_ps_telemetry.arrays import as_numpy  # noqa: E402
+from f1_ps_telemetry.arrays import best_lap_ms  # noqa: E402
+from f1_ps_telemetry.arrays import decode_buttons_bulk  # noqa: E402
+from f1_ps_telemetry.arrays import from_storage  # noqa: E402
+from f1_ps_telemetry.arrays import gather_packets  # noqa: E402
+from f1_ps_telemetry.arrays import motion_normals  # noqa: E402
+from f1_ps_telemetry.arrays import parse_many  # noqa: E402
+from f1_ps_telemetry.arrays import parse_packet  # noqa: E402
+from f1_ps_telemetry.arrays import scan_headers  # noqa: E402
+from f1_ps_telemetry.arrays import sector_mins  # noqa: E402
+from f1_ps_telemetry.arrays import to_storage  # noqa: E402
+from f1_ps_telemetry.arrays import wheels  # noqa: E402
+from f1_ps_telemetry.packets import PacketCarTelemetryData_V1  # noqa: E402
+from f1_ps_telemetry.packets import PacketLapData_V1  # noqa: E402
+from f1_ps_telemetry.packets import PacketMotionData_V1  # noqa: E402
+from f1_ps_telemetry.packets import PacketParticipantsData_V1  # noqa: E402
+from f1_ps_telemetry.packets import PacketSessionHistoryData_V1  # noqa: E402
+from f1_ps_telemetry.unpack_udp import UnpackError  # noqa: E402
+
+
+def _telemetry(make_packet, seed: int = 0) -> PacketCarTelemetryData_V1:
+    return PacketCarTelemetryData_V1.from_buffer_copy(make_packet(6, seed))
+
+
+def test_telemetry_ring_wraps_around_oldest_first(make_packet):
+    ring = TelemetryRing(3)
+    assert len(ring) == 0
+    for frame in range(5):
+        telemetry = _telemetry(make_packet)
+        telemetry.header.sessionTime = frame
+        for (car_index, car) in enumerate(telemetry.carTelemetryData):
+            car.speed = 100 * frame + car_index
+        # Alternate raw packets and structures.
+        ring.push(bytes(telemetry) if frame % 2 else telemetry)
+        assert len(ring) == min(frame + 1, 3)
+    frames = ring.to_float()
+    assert frames["sessionTime"].tolist() == [2.0, 3.0, 4.0]
+    assert frames["speed"][:, 5].tolist() == [205, 305, 405]
+    assert frames["speed"].shape == (3, 22)
+
+
+def test_telemetry_ring_quantisation(make_packet):
+    rng = np.random.default_rng(0)
+    values = {
+        "throttle": rng.uniform(0.0, 1.0, 22),
+        "brake": rng.uniform(0.0, 1.0, 22),
+        "steer": rng.uniform(-1.0, 1.0, 22),
+    }
+    telemetry = _telemetry(make_packet)
+    for (car_index, car) in enumerate(telemetry.carTelemetryData):
+        for (fname, column) in values.items():
+            setattr(car, fname, column[car_index])
+    ring = TelemetryRing(1)
+    ring.push(telemetry)
+    frames = ring.to_float()
+    for (fname, scale) in [("throttle", 255), ("brake", 255), ("steer", 127)]:
+        expected = np.float32(values[fname])
+        error = np.abs(frames[fname][0] - expected)
+        assert error.max() <= 0.5 / scale + 1e-6, fname
+
+
+def test_telemetry_ring_clips_out_of_range_values(make_packet):
+    telemetry = _telemetry(make_packet)
+    car = telemetry.carTelemetryData[0]
+    (car.throttle, car.brake, car.steer) = (1.5, -0.5, -3.0)
+    ring = TelemetryRing(1)
+    ring.push(telemetry)
+    frames = ring.to_float()
+    assert frames["throttle"][0, 0] == 1.0
+    assert frames["brake"][0, 0] == 0.0
+    assert frames["steer"][0, 0] == -1.0
+
+
+def test_telemetry_ring_rejects_other_packets(make_packet):
+    ring = TelemetryRing(2)
+    with pytest.raises(ValueError, match="Expected a PacketCarTelemetryData"):
+        ring.push(make_packet(0))
+    with pytest.raises(UnpackError):
+        ring.push(make_packet(6)[:-1])
+    assert len(ring) == 0
+
+
+@pytest.mark.parametrize("capacity", [0, -1])
+def test_telemetry_ring_capacity(capacity):
+    with pytest.raises(ValueError, match="capacity must be at least 1"):
+        TelemetryRing(capacity)
+
+
+def test_gather_packets(make_packet):
+    packet_ids = [6, 0, 6, 3, 1, 6, 3]
+    packets = [make_packet(i, seed) for (seed, i) in enumerate(packet_ids)]
+    buffer = b"".join(packets)
+    (offsets, scanned_ids) = scan_headers(buffer)
+    assert scanned_ids.tolist() == packet_ids
+    assert offsets.tolist() == [
+        sum(map(len, packets[:i])) for i in range(len(packets))
+    ]
+    for packet_id in set(packet_ids):
+        gathered = gather_packets(buffer, offsets, scanned_ids, packet_id)
+        expected = [p for (i, p) in zip(packet_ids, packets) if i == packet_id]
+        assert gathered.dtype == PACKET_DTYPE_BY_ID[packet_id]
+        assert [bytes(record) for record in gathered] == expected
+    empty = gather_packets(buffer, offsets, scanned_ids, 2)
+    assert empty.shape == (0,)
+
+
+@pytest.mark.parametrize(
+    "packet_ids", [[3, 3], []], ids=["shorter-than-packet", "empty"]
+)
+def test_gather_packets_from_short_buffer(make_packet, packet_ids):
+    buffer = b"".join(make_packet(i) for i in packet_ids)
+    (offsets, scanned_ids) = scan_headers(buffer)
+    gathered = gather_packets(buffer, offsets, scanned_ids, 0)
+    assert gathered.shape == (0,)
+    assert gathered.dtype == PACKET_DTYPE_BY_ID[0]
+    events = gather_packets(buffer, offsets, scanned_ids, 3)
+    assert [bytes(record) for record in events] == [make_packet(3)] * len(
+        packet_ids
+    )
+
+
+def _session_history(make_packet, laps) -> PacketSessionHistoryData_V1:
+    """Return a session history packet holding the given laps, as (lap time,
+    sector 1, sector 2, sector 3, valid flags) tuples, followed by laps that
+    are faster but beyond numLaps.
+    """
+    history = PacketSessionHistoryData_V1.from_buffer_copy(make_packet(11))
+    history.numLaps = len(laps)
+    for (index, lap) in enumerate(history.lapHistoryData):
+        values = laps[index] if index < len(laps) else (1, 1, 1, 1, 0x0F)
+        (
+            lap.lapTimeInMS,
+            lap.sector1TimeInMS,
+            lap.sector2TimeInMS,
+            lap.sector3TimeInMS,
+            lap.lapValidBitFlags,
+        ) = values
+    return history
+
+
+LAPS = [
+    (91000, 30000, 31000, 30000, 0x0F),
+    # Faster, but the lap and sector 2 are invalid.
+    (89000, 29000, 29500, 30500, 0x0A),
+    (90000, 29500, 30000, 30500, 0x0F),
+    # The lap in progress, with no lap or sector 3 time yet.
+    (0, 29200, 30800, 0, 0x0F),
+]
+
+
+def test_best_lap_ms(make_packet):
+    history = _session_history(make_packet, LAPS)
+    assert best_lap_ms(history) == 90000
+    assert best_lap_ms(bytes(history)) == 90000
+
+
+def test_sector_mins(make_packet):
+    history = _session_history(make_packet, LAPS)
+    assert sector_mins(history) == (29000, 30000, 30000)
+    assert sector_mins(bytes(history)) == (29000, 30000, 30000)
+
+
+def test_lap_analytics_without_valid_times(make_packet):
+    history = _session_history(make_packet, [(0, 29200, 0, 0, 0x0F)])
+    assert best_lap_ms(history) is None
+    assert sector_mins(history) == (29200, None, None)
+    history = _session_history(make_packet, [])
+    assert best_lap_ms(history) is None
+    assert sector_mins(history) == (None, None, None)
+
+
+def test_lap_analytics_reject_other_packets(make_packet):
+    telemetry = _telemetry(make_packet)
+    for function in (best_lap_ms, sector_mins):
+        with pytest.raises(ValueError, match="Expected a PacketSessionHist"):
+            function(telemetry)
+        with pytest.raises(ValueError, match="Expected a PacketSessionHist"):
+            function(bytes(telemetry))
+        with pytest.raises(UnpackError):
+            function(make_packet(11)[:-1])
+
+
+def test_lap_data_columns_leader(make_packet):
+    lap_data = PacketLapData_V1.from_buffer_copy(make_packet(2))
+    for (index, car) in enumerate(lap_data.lapData):
+        car.carPosition = (index + 5) % 22 + 1
+    packet = bytes(lap_data)
+    assert LapDataColumns(parse_packet(packet)).leader() == 17
+    lap_data = PacketLapData_V1.from_buffer_copy(make_packet(2))
+    for car in lap_data.lapData:
+        car.carPosition = 0
+    assert LapDataColumns(parse_packet(bytes(lap_data))).leader() is None
+    columns = LapDataColumns(parse_many(packet * 3, 2))
+    assert columns.car_position.shape == (3, 22)
+    with pytest.raises(ValueError, match="single record"):
+        columns.leader()
+
+
+def test_wheels(make_packet):
+    telemetry = _telemetry(make_packet)
+    car = telemetry.carTelemetryData[3]
+    pressures = wheels(car, "tyresPressure")
+    assert pressures.dtype == np.float32
+    assert pressures.tolist() == list(car.tyresPressure)
+    pressures[2] = 23.5
+    assert car.tyresPressure[2] == 23.5
+    assert wheels(car, "brakesTemperature").tolist() == list(
+        car.brakesTemperature
+    )
+
+
+def test_wheels_errors(make_packet):
+    car = _telemetry(make_packet).carTelemetryData[0]
+    with pytest.raises(KeyError):
+        wheels(car, "tyrePressure")
+    with pytest.raises(ValueError, match="speed is not an array"):
+        wheels(car, "speed")
+    participant = PacketParticipantsData_V1().participants[0]
+    with pytest.raises(ValueError, match="name is not an array"):
+        wheels(participant, "name")
+
+
+@pytest.mark.parametrize("packet_id", range(len(PACKET_DTYPE_BY_ID)))
+def test_parse_packet(make_packet, packet_id):
+    packet = make_packet(packet_id)
+    buffer = bytearray(2048)
+    buffer[:len(packet)] = packet
+    record = parse_packet(packet)
+    assert record.dtype == PACKET_DTYPE_BY_ID[packet_id]
+    assert bytes(record) == packet
+    assert bytes(parse_packet(buffer, len(packet))) == packet
+    with pytest.raises(UnpackError, match="bad size"):
+        parse_packet(buffer)
+    with pytest.raises(UnpackError, match="bad size"):
+        parse_packet(buffer, len(packet) - 1)
+
+
+def _motion(make_packet) -> PacketMotionData_V1:
+    """Return a motion packet with realistic values in the fields read by the
+    tests, for each car i.
+    """
+    motion = PacketMotionData_V1.from_buffer_copy(make_packet(0))
+    for (i, car) in enumerate(motion.carMotionData):
+        car.worldPositionX = 100.25 * i - 1000.0
+        car.worldVelocityZ = 0.5 + i
+        car.gForceLateral = -1.5 + 0.125 * i
+        car.yaw = 0.01 * i
+        car.worldForwardDirX = 1000 * i - 11000
+        car.worldRightDirZ = -32767 + i
+    motion.localVelocityX = 123.456789
+    return motion
+
+
+def test_storage_round_trip(make_packet):
+    motion = _motion(make_packet)
+    record = parse_packet(bytes(motion))
+    stored = to_storage(record)
+    cars = stored["carMotionData"]
+    assert cars.dtype["worldPositionX"] == np.float16
+    assert cars.dtype["worldForwardDirX"] == np.int16
+    assert stored.dtype["localVelocityX"] == np.float32
+    assert stored.dtype.itemsize < PACKET_DTYPE_BY_ID[0].itemsize
+    restored = from_storage(stored, 0)
+    assert restored.dtype == PACKET_DTYPE_BY_ID[0]
+    cars = restored["carMotionData"]
+    for (i, car) in enumerate(motion.carMotionData):
+        # float16 keeps 11 significant bits.
+        for fname in ("worldPositionX", "worldVelocityZ", "yaw"):
+            expected = getattr(car, fname)
+            assert cars[fname][i] == pytest.approx(expected, rel=2 ** -11)
+        assert cars["gForceLateral"][i] == car.gForceLateral
+        assert cars["worldForwardDirX"][i] == car.worldForwardDirX
+        assert cars["worldRightDirZ"][i] == car.worldRightDirZ
+    assert restored["localVelocityX"] == np.float32(motion.localVelocityX)
+    assert restored["header"]["sessionUID"] == motion.header.sessionUID
+
+
+def test_storage_at_full_precision(make_packet):
+    record = parse_packet(bytes(_motion(make_packet)))
+    stored = to_storage(record, half_precision_fields=set())
+    assert stored.dtype.itemsize == record.dtype.itemsize
+    assert bytes(from_storage(stored, 0)) == bytes(record)
+
+
+MOTION_COLUMNS = {
+    "pos_x": "worldPositionX",
+    "pos_y": "worldPositionY",
+    "pos_z": "worldPositionZ",
+    "vel_x": "worldVelocityX",
+    "vel_y": "worldVelocityY",
+    "vel_z": "worldVelocityZ",
+    "g_force_lateral": "gForceLateral",
+    "g_force_longitudinal": "gForceLongitudinal",
+    "g_force_vertical": "gForceVertical",
+    "yaw": "yaw",
+    "pitch": "pitch",
+    "roll": "roll",
+}
+
+
+def test_motion_columns(make_packet):
+    motion = _motion(make_packet)
+    columns = MotionColumns(parse_packet(bytes(motion)))
+    for (name, fname) in MOTION_COLUMNS.items():
+        expected = [getattr(car, fname) for car in motion.carMotionData]
+        assert getattr(columns, name).tolist() == expected, name
+    many = MotionColumns(parse_many(bytes(motion) * 2, 0))
+    assert many.pos_x.shape == (2, 22)
+    assert many.pos_x[1].tolist() == columns.pos_x.tolist()
+
+
+LAP_DATA_COLUMNS = {
+    "last_lap_time_ms": "lastLapTimeInMS",
+    "current_lap_time_ms": "currentLapTimeInMS",
+    "lap_distance": "lapDistance",
+    "total_distance": "totalDistance",
+    "car_position": "carPosition",
+    "current_lap_num": "currentLapNum",
+    "pit_status": "pitStatus",
+    "result_status": "resultStatus",
+}
+
+
+def test_lap_data_columns(make_packet):
+    lap_data = PacketLapData_V1.from_buffer_copy(make_packet(2))
+    for (i, car) in enumerate(lap_data.lapData):
+        car.lastLapTimeInMS = 90000 + i
+        car.lapDistance = 10.5 * i
+        car.currentLapNum = i % 5
+    columns = LapDataColumns(parse_packet(bytes(lap_data)))
+    for (name, fname) in LAP_DATA_COLUMNS.items():
+        expected = [getattr(car, fname) for car in lap_data.lapData]
+        assert getattr(columns, name).tolist() == expected, name
+
+
+DIRECTION_FIELDS = [
+    "worldForwardDirX",
+    "worldForwardDirY",
+    "worldForwardDirZ",
+    "worldRightDirX",
+    "worldRightDirY",
+    "worldRightDirZ",
+]
+
+
+def test_motion_normals(make_packet):
+    motion = _motion(make_packet)
+    normals = motion_normals(parse_packet(bytes(motion)))
+    assert normals.dtype == np.float32
+    assert normals.shape == (22, 6)
+    for (i, car) in enumerate(motion.carMotionData):
+        expected = [getattr(car, f) / 32767.0 for f in DIRECTION_FIELDS]
+        assert normals[i].tolist() == pytest.approx(expected, rel=1e-6)
+    assert normals[0, 5] == np.float32(-1.0)
+
+
+def test_as_numpy(make_packet):
+    telemetry = _telemetry(make_packet)
+    cars = as_numpy(bytes(telemetry))
+    assert cars.shape == (22,)
+    for fname in ("speed", "throttle", "gear", "engineRPM"):
+        expected = [getattr(car, fname) for car in telemetry.carTelemetryData]
+        assert cars[fname].tolist() == expected, fname
+    pressures = [list(car.tyresPressure) for car in telemetry.carTelemetryData]
+    assert cars["tyresPressure"].tolist() == pressures
+    # A structure is viewed, not copied.
+    view = as_numpy(telemetry)
+    view["speed"][4] = 321
+    assert telemetry.carTelemetryData[4].speed == 321
+    history = _session_history(make_packet, LAPS)
+    laps = as_numpy(history, PacketSessionHistoryData_V1)
+    assert laps.shape == (100,)
+    assert laps["lapTimeInMS"][:4].tolist() == [lap[0] for lap in LAPS]
+
+
+@pytest.mark.parametrize("packet_id", [1, 3])
+def test_as_numpy_without_car_array(make_packet, packet_id):
+    with pytest.raises(ValueError, match="has no car array"):
+        as_numpy(make_packet(packet_id))
+
+
+def test_decode_buttons_bulk():
+    words = [[0, 0x00000305], [0x80000000, 0xFFFFFFFF]]
+    pressed = decode_buttons_bulk(words)
+    assert pressed.shape == (2, 2, 32)
+    assert pressed.dtype == bool
+    for (row, row_words) in zip(pressed, words):
+        for (bits, word) in zip(row, row_words):
+            expected = [k for k in range(32) if word >> k & 1]
+            assert np.flatnonzero(bits).tolist() == expected
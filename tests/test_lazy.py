@@ -0,0 +1,58 @@
+import ctypes
+
+import pytest
+
+from f1_ps_telemetry.lazy import LazyView
+from f1_ps_telemetry.lazy import lazy_unpack
+from f1_ps_telemetry.packets import PACKET_TYPE_BY_ID
+from f1_ps_telemetry.packets import PacketParticipantsData_V1
+from f1_ps_telemetry.unpack_udp import UnpackError
+
+
+def _assert_same_fields(view, structure):
+    """Check every field of a lazy view, recursively, against the ctypes
+    structure decoded from the same bytes.
+    """
+    for (fname, ftype) in structure._fields_:
+        value = getattr(view, fname)
+        expected = getattr(structure, fname)
+        if isinstance(expected, ctypes.Structure):
+            _assert_same_fields(value, expected)
+        elif isinstance(expected, ctypes.Array):
+            assert isinstance(value, tuple), fname
+            assert len(value) == len(expected), fname
+            for (element, expected_element) in zip(value, expected):
+                if isinstance(expected_element, ctypes.Structure):
+                    _assert_same_fields(element, expected_element)
+                else:
+                    assert element == expected_element, fname
+        else:
+            assert value == expected, fname
+
+
+@pytest.mark.parametrize("packet_id", range(len(PACKET_TYPE_BY_ID)))
+def test_lazy_unpack(make_packet, packet_id):
+    packet_type = PACKET_TYPE_BY_ID[packet_id]
+    packet = make_packet(packet_id)
+    view = lazy_unpack(packet)
+    assert isinstance(view, LazyView)
+    assert type(view).__name__ == "Lazy" + packet_type.__name__
+    structure = packet_type.from_buffer_copy(packet)
+    _assert_same_fields(view, structure)
+
+
+def test_lazy_char_arrays(make_packet):
+    participants = PacketParticipantsData_V1.from_buffer_copy(make_packet(4))
+    # A short name, followed by a NUL and the previous, non-NUL bytes.
+    participants.participants[1].name = b"Driver"
+    participants.participants[2].name = b""
+    participants.participants[3].name = b"x" * 48
+    view = lazy_unpack(bytes(participants))
+    names = [participant.name for participant in view.participants]
+    assert names[1:4] == [b"Driver", b"", b"x" * 48]
+    assert names == [p.name for p in participants.participants]
+
+
+def test_lazy_unpack_errors(make_packet):
+    with pytest.raises(UnpackError, match="bad size"):
+        lazy_unpack(make_packet(6)[:-1])
@@ -0,0 +1,250 @@
+import copy
+import ctypes
+import pickle
+
+import pytest
+
+from f1_ps_telemetry.packed_little_endian import PackedLittleEndianStructure
+from f1_ps_telemetry.packets import PACKET_TYPE_BY_ID
+from f1_ps_telemetry.packets import PacketHeader
+
+
+def _ctypes_values(structure) -> list:
+    """Return the values of all fields of a structure in declaration order, as
+    read through ctypes, with nested structures and arrays flattened.
+    """
+    values = []
+    for (fname, ftype) in structure._fields_:
+        field = getattr(type(structure), fname)
+        if issubclass(ftype, ctypes.Array) and ftype._type_ is ctypes.c_char:
+            # ctypes stops char arrays at the first NUL; as_tuple() does not.
+            start = ctypes.addressof(structure) + field.offset
+            values.append(ctypes.string_at(start, field.size))
+        else:
+            values.extend(_flatten(getattr(structure, fname)))
+    return values
+
+
+def _flatten(value) -> list:
+    if isinstance(value, ctypes.Structure):
+        return _ctypes_values(value)
+    if isinstance(value, ctypes.Array):
+        return [item for element in value for item in _flatten(element)]
+    return [value]
+
+
+@pytest.mark.parametrize("packet_id", range(len(PACKET_TYPE_BY_ID)))
+def test_as_tuple(make_packet, packet_id):
+    packet_type = PACKET_TYPE_BY_ID[packet_id]
+    structure = packet_type.from_buffer_copy(make_packet(packet_id))
+    assert structure.as_tuple() == tuple(_ctypes_values(structure))
+    assert packet_type.STRUCT.size == packet_type.SIZE
+
+
+def test_as_tuple_of_header(make_packet):
+    header = PacketHeader.from_buffer_copy(make_packet(6))
+    assert header.as_tuple() == tuple(_ctypes_values(header))
+    (packet_format, _, _, packet_version, packet_id) = header.as_tuple()[:5]
+    assert (packet_format, packet_version, packet_id) == (2022, 1, 6)
+
+
+@pytest.mark.parametrize(
+    "copy_packet",
+    [
+        lambda p: pickle.loads(pickle.dumps(p)),
+        copy.copy,
+        copy.deepcopy,
+    ],
+    ids=["pickle", "copy", "deepcopy"],
+)
+@pytest.mark.parametrize("packet_id", range(len(PACKET_TYPE_BY_ID)))
+def test_copy_round_trip(make_packet, copy_packet, packet_id):
+    structure = PACKET_TYPE_BY_ID[packet_id].from_buffer_copy(
+        make_packet(packet_id)
+    )
+    copied = copy_packet(structure)
+    assert type(copied) is type(structure)
+    assert bytes(copied) == bytes(structure)
+    assert ctypes.addressof(copied) != ctypes.addressof(structure)
+
+
+def test_as_tuple_of_bool_field():
+    class Flags(PackedLittleEndianStructure):
+        _fields_ = [("enabled", ctypes.c_bool), ("count", ctypes.c_uint16)]
+
+    assert Flags(enabled=True, count=7).as_tuple() == (True, 7)
+    assert Flags.STRUCT.size == Flags.SIZE
+
+
+class _Union(ctypes.Union):
+    _fields_ = [("word", ctypes.c_uint32), ("half", ctypes.c_uint16)]
+
+
+@pytest.mark.parametrize(
+    "ftype",
+    [_Union, ctypes.POINTER(ctypes.c_uint8), ctypes.c_wchar],
+    ids=["union", "pointer", "wchar"],
+)
+def test_as_tuple_without_struct_format(ftype):
+    class Unsupported(PackedLittleEndianStructure):
+        _fields_ = [("value", ftype), ("count", ctypes.c_uint8)]
+
+    assert Unsupported.STRUCT is None
+    with pytest.raises(TypeError, match="No struct format"):
+        Unsupported().as_tuple()
+
+
+class _Padded(ctypes.Structure):
+    _fields_ = [("small", ctypes.c_uint8), ("large", ctypes.c_uint32)]
+
+
+class _BigEndian(ctypes.BigEndianStructure):
+    _fields_ = [("value", ctypes.c_uint16)]
+
+
+class _Nested(PackedLittleEndianStructure):
+    _fields_ = [("value", ctypes.c_uint16), ("flag", ctypes.c_uint8)]
+
+
+@pytest.mark.parametrize(
+    "ftype",
+    [_Padded, _BigEndian, ctypes.c_uint32.__ctype_be__],
+    ids=["padded-structure", "big-endian-structure", "big-endian"],
+)
+def test_as_tuple_rejects_other_layouts(ftype):
+    class Outer(PackedLittleEndianStructure):
+        _fields_ = [("inner", ftype)]
+
+    assert Outer.STRUCT is None
+    with pytest.raises(TypeError, match="No struct format"):
+        Outer().as_tuple()
+
+
+def test_as_tuple_rejects_padding():
+    class Aligned(PackedLittleEndianStructure):
+        _pack_ = 4
+        _fields_ = [("small", ctypes.c_uint8), ("large", ctypes.c_uint32)]
+
+    assert Aligned.SIZE == 8
+    assert Aligned.STRUCT is None
+    with pytest.raises(TypeError, match="5 bytes, but the structure is 8"):
+        Aligned().as_tuple()
+
+
+def test_as_tuple_of_nested_structure():
+    class Outer(PackedLittleEndianStructure):
+        _fields_ = [("count", ctypes.c_uint8), ("inner", _Nested * 2)]
+
+    outer = Outer.from_buffer_copy(bytes([1, 2, 0, 3, 4, 0, 5]))
+    assert outer.as_tuple() == (1, 2, 3, 4, 5)
+    assert Outer.STRUCT.size == Outer.SIZE
+
+
+def test_as_tuple_of_subclass_without_fields(make_packet):
+    class Header(PacketHeader):
+        pass
+
+    packet = make_packet(6)
+    expected = PacketHeader.from_buffer_copy(packet).as_tuple()
+    assert Header.from_buffer_copy(packet).as_tuple() == expected
+
+
+def test_repr():
+    class Sample(PackedLittleEndianStructure):
+        _fields_ = [
+            ("code", ctypes.c_char * 4),
+            ("wheels", ctypes.c_uint8 * 2),
+            ("nested", _Nested),
+            ("ratio", ctypes.c_float),
+        ]
+
+    sample = Sample(b"SSTA", (1, 2), _Nested(3, 4), 0.5)
+    assert repr(sample) == (
+        "Sample(code=b'SSTA', wheels=[1, 2], "
+        "nested=_Nested(value=3, flag=4), ratio=0.5)"
+    )
+
+
+def test_repr_of_inherited_fields():
+    class Nested(_Nested):
+        pass
+
+    assert repr(Nested(1, 2)) == "Nested(value=1, flag=2)"
+
+
+def test_repr_without_fields():
+    class Empty(PackedLittleEndianStructure):
+        pass
+
+    assert repr(Empty()) == "Empty()"
+
+
+def test_repr_of_bit_fields():
+    class Bits(PackedLittleEndianStructure):
+        _fields_ = [
+            ("low", ctypes.c_uint8, 3),
+            ("high", ctypes.c_uint8, 5),
+        ]
+
+    bits = Bits.from_buffer_copy(bytes([0b10101011]))
+    assert repr(bits) == "Bits(low=3, high=21)"
+    assert Bits.STRUCT is None
+    with pytest.raises(TypeError, match="bit fields"):
+        bits.as_tuple()
+
+
+def test_fields_assigned_after_class_statement():
+    class Node(PackedLittleEndianStructure):
+        pass
+
+    assert Node.SIZE == 0
+    Node._fields_ = [("value", ctypes.c_uint16), ("flag", ctypes.c_uint8)]
+    assert Node.SIZE == 3
+    assert Node.STRUCT.size == 3
+    node = Node()
+    node.fill_from(b"\x01\x02\x03")
+    assert node.as_tuple() == (0x0201, 3)
+    assert repr(node) == "Node(value=513, flag=3)"
+    copied = Node.from_address_copy(ctypes.addressof(node))
+    assert bytes(copied) == b"\x01\x02\x03"
+
+
+def test_fill_from(make_packet):
+    packet = make_packet(6)
+    header = PacketHeader()
+    header.fill_from(b"\xff" * 3 + packet, 3)
+    assert bytes(header) == packet[:PacketHeader.SIZE]
+    header.fill_from(bytearray(packet))
+    assert header.packetId == 6
+    short = packet[:PacketHeader.SIZE - 1]
+    message = "Buffer of 23 bytes too short for 24 bytes at offset 0"
+    with pytest.raises(ValueError, match=message):
+        header.fill_from(short)
+    with pytest.raises(ValueError, match="too short for 24 bytes at offset 5"):
+        header.fill_from(packet[:28], 5)
+    assert header.packetId == 6
+
+
+@pytest.mark.parametrize(
+    "wrap", [bytes, bytearray, memoryview], ids=lambda w: w.__name__
+)
+def test_from_udp(make_packet, wrap):
+    packet = make_packet(6)
+    telemetry = PACKET_TYPE_BY_ID[6].from_udp(wrap(packet))
+    assert type(telemetry) is PACKET_TYPE_BY_ID[6]
+    assert bytes(telemetry) == packet
+    assert telemetry.header.packetId == 6
+
+
+def test_from_address_copy(make_packet):
+    buffer = (ctypes.c_uint8 * PacketHeader.SIZE).from_buffer_copy(
+        make_packet(6)
+    )
+    address = ctypes.addressof(buffer)
+    header = PacketHeader.from_address_copy(address)
+    assert bytes(header) == bytes(buffer)
+    # The structure is a copy, not a view of the memory.
+    buffer[PacketHeader.packetId.offset] = 3
+    assert header.packetId == 6
+    header.copy_from_address(address)
+    assert header.packetId == 3
@@ -0,0 +1,44 @@
+import ctypes
+
+import pytest
+
+from f1_ps_telemetry.packets import EXPECTED_SIZES_V1
+from f1_ps_telemetry.packets import HeaderFieldsToPacketType
+from f1_ps_telemetry.packets import PacketCarDamageData_V1
+from f1_ps_telemetry.packets import PacketCarSetupData_V1
+from f1_ps_telemetry.packets import PacketCarStatusData_V1
+from f1_ps_telemetry.packets import PacketCarTelemetryData_V1
+from f1_ps_telemetry.packets import PacketEventData_V1
+from f1_ps_telemetry.packets import PacketFinalClassificationData_V1
+from f1_ps_telemetry.packets import PacketLapData_V1
+from f1_ps_telemetry.packets import PacketLobbyInfoData_V1
+from f1_ps_telemetry.packets import PacketMotionData_V1
+from f1_ps_telemetry.packets import PacketParticipantsData_V1
+from f1_ps_telemetry.packets import PacketSessionData_V1
+from f1_ps_telemetry.packets import PacketSessionHistoryData_V1
+
+# The packet sizes given by the F1 22 UDP specification.
+SPECIFIED_SIZES = [
+    (PacketMotionData_V1, 1464),
+    (PacketSessionData_V1, 632),
+    (PacketLapData_V1, 972),
+    (PacketEventData_V1, 40),
+    (PacketParticipantsData_V1, 1257),
+    (PacketCarSetupData_V1, 1102),
+    (PacketCarTelemetryData_V1, 1347),
+    (PacketCarStatusData_V1, 1058),
+    (PacketFinalClassificationData_V1, 1015),
+    (PacketLobbyInfoData_V1, 1191),
+    (PacketCarDamageData_V1, 948),
+    (PacketSessionHistoryData_V1, 1155),
+]
+
+
+@pytest.mark.parametrize(("packet_type", "size"), SPECIFIED_SIZES)
+def test_packet_size(packet_type, size):
+    assert ctypes.sizeof(packet_type) == size
+    assert EXPECTED_SIZES_V1[packet_type] == size
+
+
+def test_expected_sizes_cover_all_packet_types():
+    assert set(EXPECTED_SIZES_V1) == set(HeaderFieldsToPacketType.values())
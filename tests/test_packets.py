@@ -0,0 +1,341 @@
+import ctypes
+import types
+
+import pytest
+
+from f1_ps_telemetry import packets
+from f1_ps_telemetry.packed_little_endian import PackedLittleEndianStructure
+from f1_ps_telemetry.packets import ASSIST_FIELD_IDX
+from f1_ps_telemetry.packets import ButtonFlag
+from f1_ps_telemetry.packets import EventDetailsParsers
+from f1_ps_telemetry.packets import FIELDS_STRUCT_BY_ID
+from f1_ps_telemetry.packets import HEADER_KEY_STRUCT
+from f1_ps_telemetry.packets import HEADER_SIZE
+from f1_ps_telemetry.packets import PACKET_TYPE_BY_ID
+from f1_ps_telemetry.packets import PacketCarTelemetryData_V1
+from f1_ps_telemetry.packets import PacketEventData_V1
+from f1_ps_telemetry.packets import PacketHeader
+from f1_ps_telemetry.packets import PacketID
+from f1_ps_telemetry.packets import PacketSessionData_V1
+from f1_ps_telemetry.packets import PacketSessionHistoryData_V1
+from f1_ps_telemetry.packets import fields_tuple_type
+from f1_ps_telemetry.packets import iter_pressed
+from f1_ps_telemetry.packets import parse_event_details
+from f1_ps_telemetry.packets import unpack_event
+from f1_ps_telemetry.packets import unpack_session_history_prefix
+from f1_ps_telemetry.packets import unpack_telemetry_tail
+
+# The nine assist fields of the session packet, in specification order.
+ASSIST_FIELDS = [
+    "steeringAssist",
+    "brakingAssist",
+    "gearboxAssist",
+    "pitAssist",
+    "pitReleaseAssist",
+    "ERSAssist",
+    "DRSAssist",
+    "dynamicRacingLine",
+    "dynamicRacingLineType",
+]
+
+
+def test_assists_block_layout():
+    block = PacketSessionData_V1.assistsBlock
+    previous = PacketSessionData_V1.pitStopRejoinPosition
+    assert block.offset == previous.offset + previous.size
+    assert block.size == len(ASSIST_FIELDS)
+    assert PacketSessionData_V1.gameMode.offset == block.offset + block.size
+    assert list(ASSIST_FIELD_IDX) == ASSIST_FIELDS
+    assert list(ASSIST_FIELD_IDX.values()) == list(range(len(ASSIST_FIELDS)))
+
+
+@pytest.mark.parametrize("fname", ASSIST_FIELDS)
+def test_assist_property(make_packet, fname):
+    packet = make_packet(1)
+    session = PacketSessionData_V1.from_buffer_copy(packet)
+    offset = PacketSessionData_V1.assistsBlock.offset + ASSIST_FIELD_IDX[fname]
+    assert getattr(session, fname) == packet[offset]
+    setattr(session, fname, 0xA5)
+    assert bytes(session)[offset] == 0xA5
+    assert bytes(session)[:offset] == packet[:offset]
+    assert bytes(session)[offset + 1:] == packet[offset + 1:]
+
+
+def _event_packet(make_packet, code: bytes) -> bytes:
+    packet = bytearray(make_packet(3))
+    offset = PacketEventData_V1.eventStringCode.offset
+    packet[offset:offset + 4] = code
+    return bytes(packet)
+
+
+@pytest.mark.parametrize("code", sorted(EventDetailsParsers))
+def test_parse_event_details(make_packet, code):
+    packet = _event_packet(make_packet, code)
+    offset = PacketEventData_V1.eventDetails.offset
+    details = parse_event_details(code, packet, offset)
+    # The namedtuple mirrors the ctypes structure of the same name.
+    details_type = getattr(packets, type(details).__name__)
+    expected = details_type.from_buffer_copy(packet, offset)
+    assert details._fields == tuple(f for (f, _) in details_type._fields_)
+    for fname in details._fields:
+        assert getattr(details, fname) == getattr(expected, fname)
+    event = PacketEventData_V1.from_buffer_copy(packet)
+    assert event.details == details
+    assert parse_event_details(code, packet[offset:]) == details
+
+
+@pytest.mark.parametrize("code", [b"SSTA", b"SEND", b"DRSE", b"CHQF"])
+def test_parse_event_details_without_details(make_packet, code):
+    packet = _event_packet(make_packet, code)
+    assert PacketEventData_V1.from_buffer_copy(packet).details is None
+
+
+def test_unpack_event(make_packet):
+    offset = PacketEventData_V1.eventDetails.offset
+    packet = _event_packet(make_packet, b"RTMT")
+    assert unpack_event(packet) == (b"RTMT", packet[offset])
+    packet = _event_packet(make_packet, b"SPTP")
+    details = parse_event_details(b"SPTP", packet, offset)
+    assert unpack_event(packet) == (b"SPTP", details)
+
+
+def _resolve(structure, name: str):
+    """Return the value of a flattened field name, e.g.
+    carTelemetryData_3_tyresPressure_2, read through ctypes.
+    """
+    value = structure
+    while name:
+        if isinstance(value, ctypes.Array):
+            (index, _, name) = name.partition("_")
+            value = value[int(index)]
+        else:
+            fname = next(
+                f for (f, _) in value._fields_
+                if name == f or name.startswith(f + "_")
+            )
+            value = getattr(value, fname)
+            name = name[len(fname) + 1:]
+    return value
+
+
+@pytest.mark.parametrize("packet_id", range(len(PACKET_TYPE_BY_ID)))
+def test_fields_struct(make_packet, packet_id):
+    packet = make_packet(packet_id)
+    structure = PACKET_TYPE_BY_ID[packet_id].from_buffer_copy(packet)
+    fields_struct = FIELDS_STRUCT_BY_ID[packet_id]
+    assert HEADER_SIZE + fields_struct.size == len(packet)
+    fields = fields_tuple_type(packet_id)._make(
+        fields_struct.unpack_from(packet, HEADER_SIZE)
+    )
+    for (name, value) in zip(fields._fields, fields):
+        if isinstance(value, bytes):
+            # ctypes stops char arrays at the first NUL.
+            value = value.split(b"\0", 1)[0]
+        assert value == _resolve(structure, name), name
+
+
+def test_fields_tuple_type_names():
+    names = fields_tuple_type(6)._fields
+    assert names[0] == "carTelemetryData_0_speed"
+    assert "carTelemetryData_21_tyresPressure_3" in names
+    assert names[-1] == "suggestedGear"
+    assert fields_tuple_type(6) is fields_tuple_type(6)
+
+
+def test_header_key_struct(make_packet):
+    header = PacketHeader.from_buffer_copy(make_packet(6))
+    # Distinct values around the key fields, so that a wrong offset shows.
+    header.gameMajorVersion = 0x11
+    header.gameMinorVersion = 0x22
+    header.sessionUID = 0x3333333333333333
+    key = HEADER_KEY_STRUCT.unpack_from(bytes(header))
+    assert key == (
+        header.packetFormat, header.packetVersion, header.packetId
+    )
+    assert key == (2022, 1, 6)
+    assert HEADER_KEY_STRUCT.size == PacketHeader.packetId.offset + 1
+    assert PacketHeader.packetFormat.offset == 0
+
+
+def test_structure_types_cover_the_module():
+    defined = [
+        value for value in vars(packets).values()
+        if isinstance(value, type)
+        and issubclass(value, PackedLittleEndianStructure)
+        and value.__module__ == packets.__name__
+    ]
+    assert set(packets.STRUCTURE_TYPES) == set(defined)
+    assert set(packets.OFFSETS) == set(packets.FMTS) == set(defined)
+    offsets = packets.OFFSETS[PacketHeader]
+    assert offsets["packetId"] == packets.HEADER_OFF_PACKET_ID
+    assert packets.FMTS[PacketHeader]["sessionTime"] == "<f"
+
+
+def test_no_loop_variables_left_in_modules():
+    for name in ("_type", "_name", "_index"):
+        assert not hasattr(packets, name), name
+
+
+@pytest.mark.parametrize("packet_id", range(len(PACKET_TYPE_BY_ID)))
+def test_peek_packet_id(make_packet, packet_id):
+    packet = make_packet(packet_id)
+    assert packets.peek_packet_id(packet) == packet_id
+    assert packets.peek_packet_id(memoryview(packet)) == packet_id
+
+
+ID_LOOKUPS = [
+    (packets.team_name, packets.TEAM_NAMES, packets.TeamIDs),
+    (packets.driver_name, packets.DRIVER_NAMES, packets.DriverIDs),
+    (packets.track_name, packets.TRACK_NAMES, packets.TrackIDs),
+    (packets.nationality, packets.NATIONALITIES, packets.NationalityIDs),
+    (packets.game_mode, packets.GAME_MODES, packets.GameModeIDs),
+    (packets.ruleset, packets.RULESETS, packets.Ruleset_IDs),
+    (packets.surface_type, packets.SURFACE_TYPES, packets.SurfaceTypes),
+    (packets.penalty_type, packets.PENALTY_TYPES, packets.PenaltyTypes),
+    (
+        packets.infringement_type,
+        packets.INFRINGEMENT_TYPES,
+        packets.InfringementTypes,
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    ("lookup", "table", "id_map"),
+    ID_LOOKUPS,
+    ids=[lookup.__name__ for (lookup, _, _) in ID_LOOKUPS],
+)
+def test_id_lookup(lookup, table, id_map):
+    assert len(table) == max(id_map) + 1
+    for value in range(-1, len(table) + 2):
+        assert lookup(value) == id_map.get(value), value
+        if 0 <= value < len(table):
+            assert table[value] == id_map.get(value), value
+
+
+def test_id_lookup_values():
+    assert packets.team_name(0) == "Mercedes"
+    assert packets.track_name(2) == "Shanghai"
+    # Unused ids inside the table are None, as are ids beyond it.
+    gaps = [i for (i, name) in enumerate(packets.TEAM_NAMES) if name is None]
+    assert gaps
+    assert all(packets.team_name(i) is None for i in gaps)
+    assert packets.team_name(len(packets.TEAM_NAMES)) is None
+    assert packets.track_name(-1) is None
+
+
+BUTTON_WORDS = [
+    0,
+    0x00000001,
+    0x80000000,
+    0x00000305,
+    0x00FF00FF,
+    0xA5A5A5A5,
+    0xFFFFFFFF,
+]
+
+
+def _pressed(buttons: int) -> tuple:
+    return tuple(flag for flag in ButtonFlag if buttons & flag)
+
+
+@pytest.mark.parametrize("buttons", BUTTON_WORDS)
+def test_button_decoders(buttons):
+    expected = _pressed(buttons)
+    assert ButtonFlag.from_word_fast(buttons) == expected
+    assert tuple(iter_pressed(buttons)) == expected
+    assert all(type(flag) is ButtonFlag for flag in expected)
+
+
+def test_button_decoders_values():
+    assert ButtonFlag.from_word_fast(0x00000305) == (
+        ButtonFlag.CROSS,
+        ButtonFlag.CIRCLE,
+        ButtonFlag.OPTIONS,
+        ButtonFlag.L1,
+    )
+    assert list(iter_pressed(0x80001000)) == [
+        ButtonFlag.R2,
+        ButtonFlag.UDP_ACTION_12,
+    ]
+
+
+def test_button_describe():
+    assert ButtonFlag.CROSS.describe() == "Cross or A"
+    assert ButtonFlag.OPTIONS.describe() == "Options or Menu"
+    assert ButtonFlag.UDP_ACTION_12.describe() == "UDP Action 12"
+    assert len({flag.describe() for flag in ButtonFlag}) == len(ButtonFlag)
+    # Plain ints are accepted; the lowest set bit is described.
+    assert ButtonFlag.describe(0x00000400) == "R1 or RB"
+    assert ButtonFlag.describe(0x00000006) == "Triangle or Y"
+
+
+@pytest.mark.parametrize("value", [0, -1, 0x100000000])
+def test_button_describe_errors(value):
+    with pytest.raises(ValueError, match="No button flag"):
+        ButtonFlag.describe(value)
+
+
+def test_unpack_telemetry_tail(make_packet):
+    telemetry = PacketCarTelemetryData_V1.from_buffer_copy(make_packet(6))
+    telemetry.mfdPanelIndex = 255
+    telemetry.mfdPanelIndexSecondaryPlayer = 2
+    telemetry.suggestedGear = -1
+    assert unpack_telemetry_tail(bytes(telemetry)) == (255, 2, -1)
+
+
+def test_unpack_session_history_prefix(make_packet):
+    history = PacketSessionHistoryData_V1.from_buffer_copy(make_packet(11))
+    fields = [
+        "carIdx",
+        "numLaps",
+        "numTyreStints",
+        "bestLapTimeLapNum",
+        "bestSector1LapNum",
+        "bestSector2LapNum",
+        "bestSector3LapNum",
+    ]
+    for (value, fname) in enumerate(fields, start=21):
+        setattr(history, fname, value)
+    prefix = unpack_session_history_prefix(bytes(history))
+    assert prefix == tuple(range(21, 28))
+
+
+def test_final_classification_num_cars(make_packet):
+    classification = PACKET_TYPE_BY_ID[8].from_buffer_copy(make_packet(8))
+    classification.numCars = 20
+    offset = packets.FINAL_CLASSIFICATION_NUM_CARS_OFFSET
+    assert bytes(classification)[offset] == 20
+
+
+def test_packet_id_descriptions():
+    assert len(PacketID.short_description) == len(PacketID)
+    assert len(PacketID.long_description) == len(PacketID)
+    assert PacketID.short_description[PacketID.CAR_TELEMETRY] == (
+        "Car Telemetry"
+    )
+    assert PacketID.short_description[11] == "Session History"
+    assert PacketID.long_description[PacketID.EVENT] == (
+        "Various notable events that happen during a session"
+    )
+    assert PacketID.short_description[PacketID.MOTION] == "Motion"
+
+
+@pytest.mark.parametrize(
+    "id_map",
+    [id_map for (_, _, id_map) in ID_LOOKUPS],
+    ids=[lookup.__name__ for (lookup, _, _) in ID_LOOKUPS],
+)
+def test_id_maps_are_read_only(id_map):
+    assert isinstance(id_map, types.MappingProxyType)
+    assert list(id_map) == sorted(id_map)
+    with pytest.raises(TypeError):
+        id_map[0] = "Changed"
+    with pytest.raises(TypeError):
+        del id_map[next(iter(id_map))]
+
+
+def test_id_map_values():
+    assert packets.TeamIDs[0] == "Mercedes"
+    assert packets.TrackIDs[2] == "Shanghai"
+    assert packets.TrackIDs.get(-1) is None
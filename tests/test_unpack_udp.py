@@ -0,0 +1,315 @@
+import re
+
+import pytest
+
+from f1_ps_telemetry.packets import PACKET_TYPE_BY_ID
+from f1_ps_telemetry.unpack_udp import PacketPool
+from f1_ps_telemetry.unpack_udp import UDPUnpacker
+from f1_ps_telemetry.unpack_udp import UnpackError
+from f1_ps_telemetry.unpack_udp import assert_size
+from f1_ps_telemetry.unpack_udp import packet_type_for
+
+PACKET_IDS = range(len(PACKET_TYPE_BY_ID))
+
+
+def _with_key(packet: bytes, packet_format: int, packet_id: int) -> bytes:
+    return (
+        packet_format.to_bytes(2, "little")
+        + packet[2:5]
+        + bytes([packet_id])
+        + packet[6:]
+    )
+
+
+def _in_buffer(packet: bytes) -> bytearray:
+    buffer = bytearray(2048)
+    buffer[:len(packet)] = packet
+    return buffer
+
+
+@pytest.fixture
+def unpacker():
+    return UDPUnpacker()
+
+
+@pytest.mark.parametrize("packet_id", PACKET_IDS)
+def test_unpack_udp_packet(unpacker, make_packet, packet_id):
+    packet = make_packet(packet_id)
+    unpacked = unpacker.unpack_udp_packet(packet)
+    assert type(unpacked) is PACKET_TYPE_BY_ID[packet_id]
+    assert bytes(unpacked) == packet
+
+
+@pytest.mark.parametrize("packet_id", PACKET_IDS)
+def test_unpack_udp_packet_from_larger_buffer(
+    unpacker, make_packet, packet_id
+):
+    packet = make_packet(packet_id)
+    unpacked = unpacker.unpack_udp_packet(_in_buffer(packet), len(packet))
+    assert bytes(unpacked) == packet
+
+
+_BAD_SIZE = (
+    "bad size for PacketCarTelemetryData_V1 packet; "
+    "expected 1347 bytes but received {} bytes."
+)
+
+# Changes turning a valid car telemetry packet into a bad one, with the nbytes
+# argument (None for the whole packet) and the expected message. These cover
+# every route of unpack_udp_packet(): the fallback for packets without a packet
+# id byte, the default unpacker of ids without a packet type, and the
+# specialised unpackers.
+BAD_PACKETS = [
+    pytest.param(lambda p: b"", None, "too short (0 bytes).", id="empty"),
+    pytest.param(lambda p: p[:5], None, "too short (5 bytes).", id="no-id"),
+    pytest.param(lambda p: p[:6], None, "too short (6 bytes).", id="id-only"),
+    pytest.param(
+        lambda p: p[:23], None, "too short (23 bytes).", id="short-header"
+    ),
+    pytest.param(
+        lambda p: _with_key(p, 2021, 6),
+        None,
+        "no match for key fields (2021, 1, 6).",
+        id="bad-format",
+    ),
+    pytest.param(
+        lambda p: _with_key(p, 2022, 12),
+        None,
+        "no match for key fields (2022, 1, 12).",
+        id="id-12",
+    ),
+    pytest.param(
+        lambda p: _with_key(p, 2022, 200),
+        None,
+        "no match for key fields (2022, 1, 200).",
+        id="id-200",
+    ),
+    pytest.param(
+        lambda p: p[:-1], None, _BAD_SIZE.format(1346), id="byte-short"
+    ),
+    pytest.param(
+        lambda p: p + b"\0", None, _BAD_SIZE.format(1348), id="byte-long"
+    ),
+    pytest.param(
+        _in_buffer, None, _BAD_SIZE.format(2048), id="buffer-without-nbytes"
+    ),
+    pytest.param(
+        _in_buffer, 1346, _BAD_SIZE.format(1346), id="buffer-bad-nbytes"
+    ),
+    pytest.param(
+        lambda p: p[:1000],
+        1347,
+        _BAD_SIZE.format(1000),
+        id="nbytes-beyond-buffer",
+    ),
+    pytest.param(
+        lambda p: p[:10], 1347, "too short (10 bytes).", id="nbytes-beyond-id"
+    ),
+    pytest.param(
+        lambda p: p[:5], 1347, "too short (5 bytes).", id="nbytes-beyond-5"
+    ),
+]
+
+
+@pytest.mark.parametrize(("change", "nbytes", "message"), BAD_PACKETS)
+def test_unpack_udp_packet_errors(
+    unpacker, make_packet, change, nbytes, message
+):
+    packet = change(make_packet(6))
+    expected = re.escape("Bad telemetry packet: " + message)
+    with pytest.raises(UnpackError, match=expected):
+        unpacker.unpack_udp_packet(packet, nbytes)
+    with pytest.raises(UnpackError, match=expected):
+        packet_type_for(packet, nbytes)
+
+
+def test_unsupported_udp_spec():
+    message = "Unsupported UDP specification 21; supported: 22."
+    with pytest.raises(ValueError, match=re.escape(message)):
+        UDPUnpacker(21)
+
+
+def test_assert_size():
+    assert_size(6, 1347)
+    with pytest.raises(UnpackError, match="expected 1347 bytes"):
+        assert_size(6, 1346)
+    for packet_id in (12, 255, -1):
+        with pytest.raises(UnpackError, match="unknown packet id"):
+            assert_size(packet_id, 1347)
+
+
+@pytest.mark.parametrize("packet_id", PACKET_IDS)
+def test_unpack_udp_packet_fast(unpacker, make_packet, packet_id):
+    packet = make_packet(packet_id)
+    fields = unpacker.unpack_udp_packet_fast(_in_buffer(packet), len(packet))
+    structure = unpacker.unpack_udp_packet(packet)
+    header_values = len(structure.header.as_tuple())
+    assert tuple(fields) == structure.as_tuple()[header_values:]
+    with pytest.raises(UnpackError):
+        unpacker.unpack_udp_packet_fast(packet[:-1])
+
+
+def test_packet_pool_reuses_released_slots(make_packet):
+    pool = PacketPool(1)
+    packet = make_packet(6)
+    slot = pool.acquire(packet)
+    assert type(slot) is PACKET_TYPE_BY_ID[6]
+    assert bytes(slot) == packet
+    # With the pool empty, a new structure is created.
+    other = pool.acquire(make_packet(6, 1))
+    assert other is not slot
+    pool.release(slot)
+    pool.release(other)
+    reused = pool.acquire(make_packet(6, 2))
+    assert reused is slot
+    assert bytes(reused) == make_packet(6, 2)
+
+
+def test_packet_pool_rejects_double_release(make_packet):
+    pool = PacketPool(2)
+    slot = pool.acquire(make_packet(6))
+    pool.release(slot)
+    with pytest.raises(ValueError, match="already released"):
+        pool.release(slot)
+    with pytest.raises(ValueError, match="not acquired from this pool"):
+        pool.release(PACKET_TYPE_BY_ID[6]())
+    first = pool.acquire(make_packet(6))
+    second = pool.acquire(make_packet(6, 1))
+    assert first is not second
+
+
+def test_packet_pool_allocates_on_first_use(make_packet):
+    pool = PacketPool(3)
+    assert pool._free == {}
+    slot = pool.acquire(make_packet(6))
+    assert list(pool._free) == [PACKET_TYPE_BY_ID[6]]
+    assert len(pool._free[PACKET_TYPE_BY_ID[6]]) == 2
+    pool.release(slot)
+    assert len(pool._free[PACKET_TYPE_BY_ID[6]]) == 3
+
+
+def test_packet_pool_borrow_releases_on_exception(make_packet):
+    pool = PacketPool(1)
+    with pytest.raises(RuntimeError):
+        with pool.borrow(make_packet(6)) as slot:
+            raise RuntimeError
+    assert pool.acquire(make_packet(6, 1)) is slot
+    with pytest.raises(UnpackError):
+        with pool.borrow(make_packet(6)[:-1]):
+            pass
+
+
+def test_parse_burst(make_packet):
+    pool = PacketPool(1)
+    packet_ids = [6, 0, 6, 3, 11]
+    packets = [make_packet(i, seed) for (seed, i) in enumerate(packet_ids)]
+    slots = pool.parse_burst(bytearray(b"".join(packets)))
+    assert [type(slot) for slot in slots] == [
+        PACKET_TYPE_BY_ID[i] for i in packet_ids
+    ]
+    assert [bytes(slot) for slot in slots] == packets
+    assert len(set(map(id, slots))) == len(slots)
+    assert pool.parse_burst(b"") == []
+
+
+@pytest.mark.parametrize(
+    "bad_packet",
+    [
+        lambda make_packet: make_packet(6)[:-1],
+        lambda make_packet: make_packet(6)[:4],
+        lambda make_packet: _with_key(make_packet(6), 2022, 12),
+    ],
+    ids=["truncated", "truncated-header", "unknown-id"],
+)
+def test_parse_burst_releases_slots_on_error(make_packet, bad_packet):
+    pool = PacketPool(1)
+    buffer = make_packet(6) + make_packet(0) + make_packet(6, 1)
+    with pytest.raises(UnpackError):
+        pool.parse_burst(buffer + bad_packet(make_packet))
+    # The two car telemetry structures filled are back in the pool, including
+    # the one created when the pool ran out.
+    free = list(pool._free[PACKET_TYPE_BY_ID[6]])
+    assert len(free) == 2
+    assert len(pool._free[PACKET_TYPE_BY_ID[0]]) == 1
+    assert pool.acquire(make_packet(6)) is free[0]
+
+
+def test_unpack_udp_packet_into_shares_the_buffer(unpacker, make_packet):
+    packet = make_packet(6)
+    buffer = _in_buffer(packet)
+    unpacked = unpacker.unpack_udp_packet_into(buffer, len(packet))
+    assert type(unpacked) is PACKET_TYPE_BY_ID[6]
+    assert bytes(unpacked) == packet
+    offset = PACKET_TYPE_BY_ID[6].suggestedGear.offset
+    buffer[offset] = 5
+    assert unpacked.suggestedGear == 5
+    unpacked.suggestedGear = 3
+    assert buffer[offset] == 3
+
+
+def test_unpack_udp_packet_reuse_ring(unpacker, make_packet):
+    ring_size = UDPUnpacker.REUSE_RING_SIZE
+    packets = [make_packet(6, seed) for seed in range(ring_size + 1)]
+    slots = [unpacker.unpack_udp_packet_reuse(p) for p in packets]
+    assert len(set(map(id, slots[:ring_size]))) == ring_size
+    # The next packet refills the oldest structure.
+    assert slots[ring_size] is slots[0]
+    assert bytes(slots[0]) == packets[ring_size]
+    assert [bytes(s) for s in slots[1:ring_size]] == packets[1:ring_size]
+    # Each packet type has a ring of its own.
+    other = unpacker.unpack_udp_packet_reuse(make_packet(0))
+    assert type(other) is PACKET_TYPE_BY_ID[0]
+    assert unpacker.unpack_udp_packet_reuse(packets[0]) is slots[1]
+    buffer = _in_buffer(packets[0])
+    reused = unpacker.unpack_udp_packet_reuse(buffer, len(packets[0]))
+    assert bytes(reused) == packets[0]
+
+
+def test_unpack_udp_packet_np(unpacker, make_packet):
+    pytest.importorskip("numpy")
+    packet = make_packet(6)
+    record = unpacker.unpack_udp_packet_np(_in_buffer(packet), len(packet))
+    assert bytes(record) == packet
+    speeds = record["carTelemetryData"]["speed"]
+    structure = unpacker.unpack_udp_packet(packet)
+    assert speeds.tolist() == [c.speed for c in structure.carTelemetryData]
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        "unpack_udp_packet_into",
+        "unpack_udp_packet_reuse",
+        "unpack_udp_packet_fast",
+        "unpack_udp_packet_np",
+    ],
+)
+@pytest.mark.parametrize("nbytes", [0, 23, 1346, 1348, 2048])
+def test_unpack_methods_reject_bad_nbytes(
+    unpacker, make_packet, method, nbytes
+):
+    if method == "unpack_udp_packet_np":
+        pytest.importorskip("numpy")
+    buffer = _in_buffer(make_packet(6))
+    with pytest.raises(UnpackError, match="Bad telemetry packet"):
+        getattr(unpacker, method)(buffer, nbytes)
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        "unpack_udp_packet",
+        "unpack_udp_packet_into",
+        "unpack_udp_packet_reuse",
+        "unpack_udp_packet_fast",
+        "unpack_udp_packet_np",
+    ],
+)
+def test_unpack_methods_reject_nbytes_beyond_buffer(
+    unpacker, make_packet, method
+):
+    if method == "unpack_udp_packet_np":
+        pytest.importorskip("numpy")
+    buffer = bytearray(make_packet(6)[:1000])
+    with pytest.raises(UnpackError, match=re.escape(_BAD_SIZE.format(1000))):
+        getattr(unpacker, method)(buffer, 1347)